@@ -0,0 +1,131 @@
+#Version 10/17/26
+import os, glob, time
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+import align_intensity
+
+class BatchAlign():
+    """
+    Align every telemetry CSV matching sGlob under files.spathdata (one file per
+    site per day) in a warm process pool. Known outputs in spathdata (such as
+    files.sPF_data_out) are skipped (see DiscoverFiles)
+
+    Each file is aligned independently and written to files.spathbatchout as
+    <name>_aligned.csv. Per-device sum/count accumulators from all files are
+    merged into one combined summary. The pool is created once and reused for
+    every file and every Run() call (use Close() or a with block to release it)
+
+    JDL 10/17/26
+    """
+    def __init__(self, files, sGlob='*.csv', n_workers=None, sEngine='numpy'):
+        self.files = files
+        self.sGlob = sGlob
+        self.n_workers = n_workers      #None uses os.cpu_count()
+        self.sEngine = sEngine
+        self._executor = None
+        self.dfFileReport = None        #One row per file: rows, secs, output path
+        self.ser_summ_intensity = None  #Combined by-device summary
+        self.dict_throughput = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.Close()
+
+    def Close(self):
+        """
+        Shut down the warm worker pool
+        """
+        if self._executor is not None: self._executor.shutdown()
+        self._executor = None
+
+    @property
+    def executor(self):
+        """
+        Warm pool; workers import pandas/align_intensity once in InitWorker
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.n_workers, initializer=InitWorker)
+        return self._executor
+
+    def DiscoverFiles(self):
+        """
+        Sorted input paths matching sGlob under spathdata, excluding known outputs
+        (files.sPF_data_out, <name>_aligned.csv and summary.csv) so a rerun never
+        re-aligns or double counts earlier results
+        """
+        return [sPF for sPF in sorted(glob.glob(self.files.spathdata + self.sGlob))
+                if not self.IsOutputFile(sPF)]
+
+    def IsOutputFile(self, sPF):
+        """
+        True if sPF is files.sPF_data_out or a BatchAlign output/summary file
+        """
+        sPF = os.path.abspath(sPF)
+        lst_outputs = [self.files.sPF_data_out, self.files.spathbatchout + 'summary.csv']
+        if sPF in [os.path.abspath(s) for s in lst_outputs]: return True
+        return sPF.endswith('_aligned.csv') and \
+               os.path.dirname(sPF) == os.path.abspath(self.files.spathbatchout.rstrip(os.sep))
+
+    def Run(self, lst_sPF=None):
+        """
+        Align files concurrently, write outputs and combined summary; return throughput
+        """
+        if lst_sPF is None: lst_sPF = self.DiscoverFiles()
+        os.makedirs(self.files.spathbatchout, exist_ok=True)
+        lst_out = [self.PathOutput(sPF) for sPF in lst_sPF]
+
+        tstart = time.perf_counter()
+        lst_results = list(self.executor.map(AlignFile, lst_sPF, lst_out,
+                                             [self.sEngine] * len(lst_sPF)))
+        self.WriteCombinedSummary([dfSumCount for _, _, dfSumCount in lst_results])
+        secs = time.perf_counter() - tstart
+
+        self.dfFileReport = pd.DataFrame({'file':[os.path.basename(s) for s in lst_sPF],
+                                          'rows':[n for n, _, _ in lst_results],
+                                          'secs':[t for _, t, _ in lst_results],
+                                          'output':lst_out})
+        self.SetThroughput(secs)
+        return self.dict_throughput
+
+    def PathOutput(self, sPF):
+        """
+        Output path for an input file: spathbatchout + <name>_aligned.csv
+        """
+        sName = os.path.splitext(os.path.basename(sPF))[0]
+        return self.files.spathbatchout + sName + '_aligned.csv'
+
+    def WriteCombinedSummary(self, lst_dfSumCount):
+        """
+        Merge per-file by-device sum/count and write combined summary CSV
+        """
+        if len(lst_dfSumCount) < 1: return
+        dfSumCount = pd.concat(lst_dfSumCount).groupby(level=0).sum()
+        self.ser_summ_intensity = align_intensity.SummaryFromSumCount(dfSumCount)
+        self.ser_summ_intensity.to_csv(self.files.spathbatchout + 'summary.csv')
+
+    def SetThroughput(self, secs):
+        """
+        Files/sec and rows/sec over the Run() wall time
+        """
+        n_files = self.dfFileReport.index.size
+        n_rows = int(self.dfFileReport['rows'].sum())
+        self.dict_throughput = {'files':n_files, 'rows':n_rows, 'secs':secs,
+                                'files_per_sec':n_files / secs if secs > 0 else None,
+                                'rows_per_sec':n_rows / secs if secs > 0 else None}
+
+def InitWorker():
+    """
+    Worker initializer: import heavy libraries once per warm worker
+    """
+    import pandas, numpy, align_intensity
+
+def AlignFile(sPF_in, sPF_out, sEngine):
+    """
+    Worker: read, align and write one file; return rows, secs and by-device sum/count
+    """
+    tstart = time.perf_counter()
+    align = align_intensity.SummIntensityByDecr(pd.read_csv(sPF_in), sEngine=sEngine)
+    align.dfC.to_csv(sPF_out, index=False)
+    return align.dfC.index.size, time.perf_counter() - tstart, align.SumCount()
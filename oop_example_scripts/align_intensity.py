@@ -1,5 +1,21 @@
 #version 7/13/22
+import pandas as pd
 import numpy as np
+import time
+import tracemalloc
+
+#Optional compiled kernel for sEngine='numba' (falls back to NumPy when not installed)
+try:
+    import numba
+    IsNumba = True
+except ImportError:
+    IsNumba = False
+
+#Increment when transform output changes (invalidates on-disk cache entries)
+TRANSFORM_VERSION = 2
+
+#Transform implementations selectable by SummIntensityByDecr(sEngine=...)
+LST_ENGINES = ('pandas', 'numpy', 'numba')
 
 class SummIntensityByDecr():
     """
@@ -10,87 +26,773 @@ class SummIntensityByDecr():
     intensity is unknown).  Previously-reported  intensity applies to a
     subsequent refill percent row
     
+    sEngine selects the transform implementation: 'pandas' (step-by-step
+    methods below), 'numpy' (single-pass AlignIntensityArrays kernel) or
+    'numba' (one compiled loop; same as 'numpy' if numba is not installed)
+
+    IsCopyFree=True leaves the caller's DataFrame untouched: dfC is a shallow
+    copy sharing the input's column buffers plus the one added intensity_aligned
+    column. (Default mutates the caller's frame in place)
+
+    IsProfile=True records wall time, rows and peak traced memory for each step
+    (see ProfileReport() and lst_profile_callbacks)
+
+    IsSortInput=True runs SortAndValidate() before transforming: input that is
+    not grouped by device with ordered timestamps is stably sorted by
+    (device_id, timestamp) into a reordered dfC (original index labels kept)
+    
     JDL 7/13/22
     """
-    def __init__(self, dfC_input):
-        self._dfC = dfC_input
+    def __init__(self, dfC_input, sEngine='pandas', IsCopyFree=False, IsProfile=False,
+                 IsSortInput=False):
+        if sEngine not in LST_ENGINES:
+            raise ValueError('sEngine must be one of ' + str(LST_ENGINES) + '; got ' + repr(sEngine))
+        self.sEngine = sEngine
+
+        #Opt-in sort/validate stage (see SortAndValidate())
+        self.IsSortInput = IsSortInput
+        self.dict_sort_stats = {}       #IsSorted, rows_out_of_order from last check
+
+        #Copy-free mode keeps caller's frame as _dfInput and works on a shallow copy
+        self.IsCopyFree = IsCopyFree
+        self._dfInput = dfC_input
+        self._dfC = dfC_input.copy(deep=False) if IsCopyFree else dfC_input
+
+        #Opt-in step instrumentation (Use self.ProfileReport() for results)
+        self.IsProfile = IsProfile
+        self.lst_profile = []           #One dict per profiled step call
+        self.lst_profile_callbacks = [] #Callback(dict_step) after each profiled step
         
-        #Initialize filters (Use self.UpdateFilters() to refresh after changes):
-        self.fil_null_alignedintensity = None   #Null perfume_intensity rows
-        self.fil_null_refperc = None     #Null Refill percent rows
-        self.fil_dev_change = None       #Device change rows
+        #Filters are built lazily (Use self.UpdateFilters() to refresh after changes)
+        self._dict_fil = {}
+
+        #Device segment index (built once per input by self.BuildSegmentIndex())
+        self._arr_dev_codes = None      #Integer-coded device_id per row
+        self._idx_devs = None           #Device_id value for each integer code
+        self._arr_seg_starts = None     #Row offset of each device run's first row
+        self._arr_seg_ids = None        #Device run number per row (groups fill down)
+        self._arr_dev_change = None     #True at device run first rows
+        self._dict_dev_index = None     #device_id: row slice or positions (see DeviceRows)
         self._serSummIntensity = None   #By-device intensity summary (Pandas Series)
+        self._serSummIntensityWeighted = None   #Consumption-weighted version
+
+        #Cache state for properties (Use self.Invalidate() after changing input data)
+        self._IsTransformed = False     #dfC transform is current
+        self._IsSummarized = False      #_serSummIntensity is current
+        self._IsSummarizedWeighted = False  #_serSummIntensityWeighted is current
+        self.dict_cache_stats = {'hits':0, 'misses':0}
+        self.CacheHook = None           #Optional callback: CacheHook(sStage, IsHit)
+
+        #Incremental append state (see self.Append())
+        self._dfDevState = None         #By-device carry, last timestamp, sum/count
+        self._lst_dfAppended = []       #Appended row blocks not yet concatenated into _dfC
 
     @property
     def ser_summ_intensity(self):
         """
-        Summarize intensity by device (weighted by consumption/decrements)
+        Summarize intensity by device (mean over populated refill percent rows)
         """
-        self.TransformProcedure()
-        self.SummarizeIntensityByDevice()
+        self.CachedTransform()
+        if not self.IsCacheHit('summary', self._IsSummarized):
+            self.RunStep(self.SummarizeIntensityByDevice)
         return self._serSummIntensity
+
+    @property
+    def ser_summ_intensity_weighted(self):
+        """
+        Summarize intensity by device weighted by consumption (refill_percent decrements)
+        """
+        self.CachedTransform()
+        self.ConsolidateAppended()
+        if not self.IsCacheHit('summary_weighted', self._IsSummarizedWeighted):
+            self.RunStep(self.SummarizeIntensityByDeviceWeighted)
+        return self._serSummIntensityWeighted
     
     @property
     def dfC(self):
         """
         Construct transformed dfC
         """
-        self.TransformProcedure()
+        self.CachedTransform()
+        self.ConsolidateAppended()
         return self._dfC
 
+    def CachedTransform(self):
+        """
+        Run TransformProcedure only if the cached transform is not current
+        """
+        if not self.IsCacheHit('transform', self._IsTransformed):
+            self.TransformProcedure()
+
+    def IsCacheHit(self, sStage, IsCurrent):
+        """
+        Record a cache hit or miss for a stage and notify optional CacheHook
+        """
+        self.dict_cache_stats['hits' if IsCurrent else 'misses'] += 1
+        if self.CacheHook is not None: self.CacheHook(sStage, IsCurrent)
+        return IsCurrent
+
+    def Invalidate(self):
+        """
+        Mark cached transform and summary as stale (call after mutating input data)
+        (Copy-free mode re-wraps the caller's frame to pick up its changes; IsSortInput
+        restarts from the caller's frame since dfC may be a sorted copy of it)
+        """
+        self.ConsolidateAppended()
+        if self._dfInput is not None and (self.IsCopyFree or self.IsSortInput):
+            self._dfC = self._dfInput.copy(deep=False) if self.IsCopyFree else self._dfInput
+        self._dfDevState = None
+        self._IsTransformed = False
+        self._IsSummarized = False
+        self._IsSummarizedWeighted = False
+        self._arr_dev_codes = None
+        self.UpdateFilters()
+
+    def SetInput(self, dfC_input):
+        """
+        Replace the input DataFrame and invalidate cached results
+        """
+        self._lst_dfAppended = []
+        self._dfInput = dfC_input
+        self._dfC = dfC_input.copy(deep=False) if self.IsCopyFree else dfC_input
+        self.Invalidate()
+
     def TransformProcedure(self):
         """
         Run all data transform methods as procedure
         """
-        self.AddIntensityAlignedCol()
+        if self.IsSortInput: self.RunStep(self.SortAndValidate)
+        if self.sEngine == 'numpy':
+            self.RunStep(self.AlignIntensityNumpy)
+        elif self.sEngine == 'numba':
+            self.RunStep(self.AlignIntensityNumba)
+        else:
+            self.RunStep(self.AddIntensityAlignedCol)
+            self.RunStep(self.UpdateFilters)
+            self.RunStep(self.FillDownDecrIntensity)
+            self.RunStep(self.UpdateFilters)
+            self.RunStep(self.ClearUnneededValues)
+        self._dfDevState = None
+        self._IsTransformed = True
+        self._IsSummarized = False
+        self._IsSummarizedWeighted = False
+
+    def RunStep(self, Step):
+        """
+        Call a transform step. If IsProfile, record wall time, rows and peak traced
+        memory above the step's starting memory, then notify callbacks
+        """
+        if not self.IsProfile: return Step()
+
+        IsTracing = tracemalloc.is_tracing()
+        if not IsTracing: tracemalloc.start()
+        tracemalloc.reset_peak()
+        iMemStart = tracemalloc.get_traced_memory()[0]
+        tstart = time.perf_counter()
+        Step()
+        secs = time.perf_counter() - tstart
+        iMemPeak = tracemalloc.get_traced_memory()[1]
+        if not IsTracing: tracemalloc.stop()
+
+        dict_step = {'step':Step.__name__, 'secs':secs, 'rows':self._dfC.index.size,
+                     'peak_mem_delta':iMemPeak - iMemStart}
+        self.lst_profile.append(dict_step)
+        for Callback in self.lst_profile_callbacks: Callback(dict_step)
+
+    def ProfileReport(self):
+        """
+        DataFrame of profiled steps (one row per step call in order)
+        """
+        return pd.DataFrame(self.lst_profile, columns=['step', 'secs', 'rows', 'peak_mem_delta'])
+
+    def SortAndValidate(self):
+        """
+        Check in O(n) that rows are grouped by device_id with non-decreasing
+        timestamps within each device (hash-coded devices and adjacent comparison
+        of raw timestamps). If so, skip sorting (device order may be any);
+        otherwise stable sort on integer-coded (device_id, timestamp) keys.
+        dict_sort_stats reports IsSorted and rows_out_of_order (rows moved by sort)
+        """
+        arr_dev_codes = DeviceCodes(self._dfC['device_id'])[0]
+        arr_dev_change = DeviceChangeArray(arr_dev_codes)
+
+        #One run per device and timestamps only decrease at device changes
+        IsGrouped = np.bincount(arr_dev_codes[arr_dev_change] + 1).max(initial=0) <= 1
+        IsTsOrdered = IsOrderedWithinRuns(self._dfC['timestamp'], arr_dev_change)
+        self.dict_sort_stats = {'IsSorted':bool(IsGrouped and IsTsOrdered), 'rows_out_of_order':0}
+        if self.dict_sort_stats['IsSorted']: return
+
+        arr_order = np.lexsort((SortKeyCodes(self._dfC['timestamp']), 
+                                SortKeyCodes(self._dfC['device_id'])))
+        self.dict_sort_stats['rows_out_of_order'] = int(np.count_nonzero(
+                                                arr_order != np.arange(arr_order.size)))
+        self._dfC = self._dfC.iloc[arr_order]
+        self._arr_dev_codes = None
+        self.UpdateFilters()
+
+    def AlignIntensityNumpy(self):
+        """
+        Single-pass NumPy alternative to AddIntensityAlignedCol...ClearUnneededValues
+        """
         self.UpdateFilters()
-        self.PopulateDeviceChangeRows()
-        self.FillDownDecrIntensity()
+        self.BuildSegmentIndex()
+        arr_intensity = FloatArray(self._dfC['intensity'])
+        self._dfC['intensity_aligned'] = AlignIntensityArrays(self._arr_dev_change, 
+                                self.fil_null_refperc.to_numpy(), arr_intensity)
+
+    def AlignIntensityNumba(self):
+        """
+        Compiled single-loop version of AlignIntensityNumpy (no array temporaries)
+        Falls back to AlignIntensityNumpy if numba is not installed
+        """
+        if not IsNumba: return self.AlignIntensityNumpy()
         self.UpdateFilters()
-        self.ClearUnneededValues()
+        self.BuildSegmentIndex()
+        arr_intensity = FloatArray(self._dfC['intensity'])
+        self._dfC['intensity_aligned'] = AlignIntensityCompiled(self._arr_dev_change,
+                                self.fil_null_refperc.to_numpy(), arr_intensity)
 
     def AddIntensityAlignedCol(self):
         """
         Add a copy of intensity to be aligned with refill_percent
+        (Explicit copy so later edits never write through to intensity's buffer)
+        """
+        self._dfC['intensity_aligned'] = self._dfC['intensity'].copy()
+
+    def BuildSegmentIndex(self):
+        """
+        Integer-code device_id and locate device run boundaries (once per input)
         """
-        self._dfC['intensity_aligned'] = self._dfC['intensity']
+        if self._arr_dev_codes is not None: return
+        self._arr_dev_codes, self._idx_devs = DeviceCodes(self._dfC['device_id'])
+        self._arr_dev_change = DeviceChangeArray(self._arr_dev_codes)
+        self._arr_seg_starts = np.flatnonzero(self._arr_dev_change)
+        self._arr_seg_ids = np.cumsum(self._arr_dev_change) - 1
+        self._dict_dev_index = None
 
     def UpdateFilters(self):
         """        
-        Filters used in sub-functions
+        Reset filters used in sub-functions. Each filter is rebuilt from current
+        data on its first access after a reset (see Filter())
         """        
-        #Null Refill percent rows
-        self.fil_null_refperc = self._dfC['refill_percent'].isnull()        
-        
-        #Null intensity rows         
-        self.fil_null_intensity = self._dfC['intensity_aligned'].isnull()
-        self.fil_null_alignedintensity = self._dfC['intensity_aligned'].isnull()
-
-        #Device change rows
-        self.fil_dev_change = self._dfC['device_id'] != self._dfC.shift(1)['device_id']
+        self._dict_fil = {}
 
-        #Intensity rows with 999 marker
-        self.fil_999 = self._dfC['intensity_aligned'] == 999.
-                
-    def PopulateDeviceChangeRows(self):
+    def Filter(self, sName, BuildFilter):
         """
-        Set 999 value to mark intensity_aligned for non-null device change rows
+        Return a named filter, building it with BuildFilter() if not current
         """
-        fil = self.fil_null_alignedintensity & self.fil_dev_change
-        self._dfC.loc[fil, 'intensity_aligned'] = 999.
+        if sName not in self._dict_fil: self._dict_fil[sName] = BuildFilter()
+        return self._dict_fil[sName]
+
+    @property
+    def fil_null_refperc(self):
+        """Null Refill percent rows"""
+        return self.Filter('null_refperc', lambda: self._dfC['refill_percent'].isnull())
+
+    @property
+    def fil_null_intensity(self):
+        """Null intensity rows (same as fil_null_alignedintensity)"""
+        return self.fil_null_alignedintensity
+
+    @property
+    def fil_null_alignedintensity(self):
+        """Null intensity_aligned rows"""
+        return self.Filter('null_aligned', lambda: self._dfC['intensity_aligned'].isnull())
+
+    @property
+    def fil_dev_change(self):
+        """Device change rows (from segment index; no DataFrame shift)"""
+        self.BuildSegmentIndex()
+        return self.Filter('dev_change', 
+                lambda: pd.Series(self._arr_dev_change, index=self._dfC.index))
 
     def FillDownDecrIntensity(self):
-        self._dfC['intensity_aligned'] = self._dfC['intensity_aligned'].ffill()
+        """
+        Fill intensity_aligned down within each device run (grouped by segment id,
+        so values never carry into the next device and no marker value is needed)
+        """
+        self.BuildSegmentIndex()
+        ser = self._dfC['intensity_aligned']
+        self._dfC['intensity_aligned'] = ser.groupby(self._arr_seg_ids).ffill()
 
     def ClearUnneededValues(self):
         self.UpdateFilters()
-                
+
         #Clear values from rows that are not populated refill percents
         self._dfC.loc[self.fil_null_refperc, 'intensity_aligned'] = np.nan
-
-        #Clear 999 markers
-        self._dfC.loc[self.fil_999, 'intensity_aligned'] = np.nan
     
     def SummarizeIntensityByDevice(self):
-        self.summ = self._dfC[~self.fil_null_refperc].groupby('device_id')
-        self._serSummIntensity = self.summ['intensity_aligned'].mean().round(2)
\ No newline at end of file
+        self.summ = self._dfC[~self.fil_null_refperc].groupby('device_id', observed=True)
+        self._serSummIntensity = self.summ['intensity_aligned'].mean().round(2)
+        self._IsSummarized = True
+
+    def SumCount(self):
+        """
+        By-device sum/count/n_refill accumulators for the transformed data 
+        (for merging results across shards or files; see SumCountByDevice)
+        """
+        dfC = self.dfC
+        self.BuildSegmentIndex()
+        return SumCountByDevice(self._arr_dev_codes, self._idx_devs, 
+                    self.fil_null_refperc.to_numpy(), FloatArray(dfC['intensity_aligned']))
+
+    def SummarizeIntensityByDeviceWeighted(self):
+        """
+        Consumption-weighted mean intensity by device. Each refill row's weight is
+        the refill_percent decrement since the device's previous refill row (0 for a
+        device's first refill row or a refill/increase). Reduced with bincount over
+        device codes; no filtered copy of the frame
+        """
+        self.BuildSegmentIndex()
+        arr_weights = DecrementWeights(self._arr_dev_change, FloatArray(self._dfC['refill_percent']))
+        dfWeighted = WeightedSumByDevice(self._arr_dev_codes, self._idx_devs, 
+                        self.fil_null_refperc.to_numpy(), FloatArray(self._dfC['intensity_aligned']),
+                        arr_weights)
+        dfWeighted = dfWeighted[dfWeighted['n_refill'] > 0]
+        ser = (dfWeighted['wsum'] / dfWeighted['weight'].where(dfWeighted['weight'] > 0)).round(2)
+        ser.name = 'intensity_aligned'
+        self._serSummIntensityWeighted = ser.sort_index()
+        self._IsSummarizedWeighted = True
+
+    def WindowSummary(self, sFreq='1D', sWindow=None, IsWeighted=False, sOrigin=None):
+        """
+        Device x time-window matrix of mean intensity_aligned keyed on timestamp
+
+        Tumbling windows of length sFreq, or (if sWindow) sliding windows of length 
+        sWindow stepping by sFreq. Sums/counts are accumulated once per sFreq bin 
+        with bincount; sliding windows are differences of cumulative bin sums 
+        (no re-grouping per window). Columns are window start times. IsWeighted 
+        uses consumption (refill_percent decrement) weights
+
+        sFreq is a fixed frequency ('1D', '6h', '7D'; windows aligned on the epoch
+        as in Timestamp.floor) or an anchored weekly offset ('W' or 'W-SUN' for
+        Monday-Sunday weeks as in resample('W'), 'W-WED', '2W'...). sOrigin (a
+        timestamp string) overrides the alignment, e.g. sFreq='7D' with
+        sOrigin='2022-06-06' for weeks starting on that Monday
+        """
+        dfC = self.dfC
+        self.BuildSegmentIndex()
+        iStep, iOrigin = WindowStepOrigin(sFreq)
+        if sOrigin is not None: iOrigin = pd.Timestamp(sOrigin).value
+        iWidth = 1 if sWindow is None else WindowStepOrigin(sWindow)[0] // iStep
+        if sWindow is not None and iWidth * iStep != WindowStepOrigin(sWindow)[0]:
+            raise ValueError('sWindow must be a whole multiple of sFreq')
+
+        #Integer bin per row (ns since first bin start) and validity mask
+        ser_ts = pd.to_datetime(dfC['timestamp'])
+        arr_ts = ser_ts.to_numpy().astype('datetime64[ns]').view('i8')
+        IsVal = ser_ts.notnull().to_numpy() & ~self.fil_null_refperc.to_numpy()
+        arr_aligned = FloatArray(dfC['intensity_aligned'])
+        IsVal &= ~np.isnan(arr_aligned) & (self._arr_dev_codes >= 0)
+        if not IsVal.any(): return pd.DataFrame(index=self._idx_devs)
+        iStart0 = iOrigin + (ser_ts.min().value - iOrigin) // iStep * iStep
+        arr_bin = np.where(IsVal, (arr_ts - iStart0) // iStep, 0)
+        n_bins = int(arr_bin.max()) + 1
+
+        #Accumulate weighted sums and weights per device x bin in one pass
+        arr_w = IsVal.astype(np.float64)
+        if IsWeighted:
+            arr_w *= DecrementWeights(self._arr_dev_change, FloatArray(dfC['refill_percent']))
+        arr_cell = np.where(IsVal, self._arr_dev_codes, 0) * n_bins + arr_bin
+        n_cells = len(self._idx_devs) * n_bins
+        arr_wsum = np.bincount(arr_cell, np.where(IsVal, arr_aligned, 0.) * arr_w, n_cells)
+        arr_wtot = np.bincount(arr_cell, arr_w, n_cells)
+        arr_wsum = arr_wsum.reshape(-1, n_bins)
+        arr_wtot = arr_wtot.reshape(-1, n_bins)
+
+        #Sliding windows: cumulative sums differenced over iWidth bins
+        if iWidth > 1:
+            arr_wsum, arr_wtot = [RollingBinSum(arr, iWidth) for arr in [arr_wsum, arr_wtot]]
+            iStart0 -= (iWidth - 1) * iStep
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            arr_mean = np.where(arr_wtot > 0, arr_wsum / arr_wtot, np.nan)
+        idx_windows = pd.DatetimeIndex(iStart0 + iStep * np.arange(arr_mean.shape[1]), 
+                                       name='window_start')
+        dfWindows = pd.DataFrame(arr_mean.round(2), index=self._idx_devs, columns=idx_windows)
+        dfWindows.index.name = 'device_id'
+        return dfWindows.sort_index()
+
+    def BuildDeviceIndex(self):
+        """
+        Map device_id to its rows once per input: a (start, stop) slice when each
+        device is one contiguous run (sorted input), else an array of row positions
+        """
+        self.BuildSegmentIndex()
+        if self._dict_dev_index is not None: return
+        arr_codes, n_devs = self._arr_dev_codes, len(self._idx_devs)
+        arr_seg_codes = arr_codes[self._arr_seg_starts]
+        if np.bincount(arr_seg_codes + 1, minlength=n_devs + 1)[1:].max(initial=0) <= 1:
+            arr_stops = np.append(self._arr_seg_starts[1:], arr_codes.size)
+            self._dict_dev_index = {self._idx_devs[code]:slice(start, stop) for code, start, stop
+                                    in zip(arr_seg_codes, self._arr_seg_starts, arr_stops) if code >= 0}
+        else:
+            arr_order = np.argsort(arr_codes, kind='stable')
+            arr_bounds = np.searchsorted(arr_codes[arr_order], np.arange(n_devs + 1))
+            self._dict_dev_index = {dev:arr_order[arr_bounds[i]:arr_bounds[i + 1]]
+                                    for i, dev in enumerate(self._idx_devs)}
+
+    def DeviceRows(self, dev):
+        """
+        One device's aligned rows from dfC by index lookup (no device_id scan)
+        Same rows as dfC[dfC['device_id'] == dev]; empty if dev has no rows
+        """
+        dfC = self.dfC
+        self.BuildDeviceIndex()
+        return dfC.iloc[self._dict_dev_index.get(dev, slice(0, 0))]
+
+    def DeviceSummary(self, dev):
+        """
+        Row counts, mean aligned intensity and timestamp span for one device
+        (intensity_aligned matches ser_summ_intensity[dev])
+        """
+        df = self.DeviceRows(dev)
+        fil = df['refill_percent'].notnull()
+        return pd.Series({'rows':df.index.size, 'refill_rows':int(fil.sum()),
+                          'intensity_aligned':round(df.loc[fil, 'intensity_aligned'].mean(), 2),
+                          'timestamp_first':df['timestamp'].min(),
+                          'timestamp_last':df['timestamp'].max()}, name=dev)
+
+    def Append(self, dfNew):
+        """
+        Align new rows from each device's last state without recomputing history
+
+        dfNew has the input columns; intensity_aligned is added to it (to a shallow
+        copy if IsCopyFree) and its rows join dfC after each device's last row (see
+        ConsolidateAppended), so dfNew's devices may be interleaved in any order.
+        Cost is O(new rows) plus O(devices) to refresh the summary. A device with late rows (timestamp before
+        that device's last row) is realigned over its own rows by RecomputeDevice(),
+        which also moves them to their timestamp position in dfC
+        """
+        self.CachedTransform()
+        if self._dfDevState is None: self.BuildDeviceState()
+        if dfNew.index.size < 1: return
+
+        #Order new rows by device (stable) so each device is one segment
+        #(codes for devices present in dfNew only, also for categorical device_id)
+        arr_codes, arr_devs = pd.factorize(dfNew['device_id'].astype(object), use_na_sentinel=False)
+        idx_new = pd.Index(arr_devs, dtype=object)
+        arr_order = np.argsort(arr_codes, kind='stable')
+        arr_codes_s = arr_codes[arr_order]
+        arr_ts_s = pd.to_datetime(dfNew['timestamp']).to_numpy()[arr_order]
+        arr_dev_change_s = DeviceChangeArray(arr_codes_s)
+        arr_starts = np.flatnonzero(arr_dev_change_s)
+        arr_ends = np.append(arr_starts[1:], arr_codes_s.size) - 1
+
+        #Late if before device's last timestamp or out of order within dfNew
+        dfState = self._dfDevState.reindex(idx_new)
+        IsBackward = np.zeros(arr_codes_s.size, dtype=bool)
+        IsBackward[1:] = (arr_ts_s[1:] < arr_ts_s[:-1]) & ~arr_dev_change_s[1:]
+        IsLate = arr_ts_s[arr_starts] < dfState['timestamp_last'].to_numpy()
+        if arr_starts.size > 0: IsLate |= np.logical_or.reduceat(IsBackward, arr_starts)
+
+        #Align sorted rows starting from each device's carried intensity
+        arr_intensity_s = FloatArray(dfNew['intensity'])[arr_order]
+        arr_null_refperc_s = dfNew['refill_percent'].isnull().to_numpy()[arr_order]
+        arr_filled_s = FillDownBySegment(arr_dev_change_s, arr_intensity_s, 
+                                         dfState['intensity_carry'].to_numpy())
+        arr_aligned_s = arr_filled_s.copy()
+        arr_aligned_s[arr_null_refperc_s] = np.nan
+        arr_aligned = np.empty_like(arr_aligned_s)
+        arr_aligned[arr_order] = arr_aligned_s
+        if self.IsCopyFree: dfNew = dfNew.copy(deep=False)
+        dfNew['intensity_aligned'] = arr_aligned
+        self._lst_dfAppended.append(dfNew)
+
+        #Update on-time devices' state and accumulators
+        dfSumCount = SumCountByDevice(arr_codes_s, idx_new, arr_null_refperc_s, arr_aligned_s)
+        cols = ['sum', 'count', 'n_refill']
+        dfState[cols] = dfState[cols].fillna(0) + dfSumCount[cols]
+        dfState['intensity_carry'] = arr_filled_s[arr_ends]
+        dfState['timestamp_last'] = arr_ts_s[arr_ends]
+        self.UpdateDeviceState(dfState[~IsLate])
+
+        for dev in idx_new[IsLate]: self.RecomputeDevice(dev)
+        self._serSummIntensity = SummaryFromSumCount(self._dfDevState)
+        self._IsSummarized = True
+        self._IsSummarizedWeighted = False
+
+    def BuildDeviceState(self):
+        """
+        By-device state for Append(): carried intensity and timestamp at each 
+        device's last row plus summary sum/count accumulators
+        """
+        self.BuildSegmentIndex()
+        arr_filled = FillDownBySegment(self._arr_dev_change, FloatArray(self._dfC['intensity']))
+        arr_codes = self._arr_dev_codes
+
+        #Last row of each device = end of its last segment
+        arr_ends = np.append(self._arr_seg_starts[1:], arr_codes.size) - 1
+        arr_ends = arr_ends[arr_codes[arr_ends] >= 0]
+        arr_last = np.full(len(self._idx_devs), -1)
+        np.maximum.at(arr_last, arr_codes[arr_ends], arr_ends)
+
+        dfState = SumCountByDevice(arr_codes, self._idx_devs, self.fil_null_refperc.to_numpy(),
+                                   self._dfC['intensity_aligned'].to_numpy())
+        dfState['intensity_carry'] = arr_filled[arr_last]
+        dfState['timestamp_last'] = pd.to_datetime(self._dfC['timestamp'].iloc[arr_last]).to_numpy()
+        self._dfDevState = dfState
+
+    def UpdateDeviceState(self, dfState):
+        """
+        Overwrite existing devices' state rows and add rows for new devices
+        """
+        fil_new = ~dfState.index.isin(self._dfDevState.index)
+        self._dfDevState.loc[dfState.index[~fil_new]] = dfState[~fil_new]
+        if fil_new.any(): self._dfDevState = pd.concat([self._dfDevState, dfState[fil_new]])
+
+    def RecomputeDevice(self, dev):
+        """
+        Realign one device's rows (history + appended) in timestamp order and reset
+        its state. The device's rows are moved into one timestamp-ordered run at its
+        first row's position in _dfC (so a later full transform agrees); other
+        devices' rows keep their relative order and values
+        """
+        self.ConsolidateAppended()
+        arr_pos = np.flatnonzero((self._dfC['device_id'] == dev).to_numpy())
+        arr_ts = pd.to_datetime(self._dfC['timestamp'].iloc[arr_pos]).to_numpy()
+        arr_order = np.argsort(arr_ts, kind='stable')
+        arr_ts = arr_ts[arr_order]
+
+        #Reorder _dfC so the device's rows are contiguous and in timestamp order
+        arr_dev_rows = arr_pos[arr_order]
+        arr_pos = arr_pos[0] + np.arange(arr_pos.size)
+        if (arr_dev_rows != arr_pos).any():
+            arr_others = np.setdiff1d(np.arange(self._dfC.index.size), arr_dev_rows)
+            self._dfC = self._dfC.iloc[np.concatenate([arr_others[:arr_pos[0]], arr_dev_rows,
+                                                       arr_others[arr_pos[0]:]])]
+            self._arr_dev_codes = None
+            self.UpdateFilters()
+
+        arr_dev_change = np.zeros(arr_pos.size, dtype=bool)
+        arr_dev_change[:1] = True
+        arr_filled = FillDownBySegment(arr_dev_change, FloatArray(self._dfC['intensity'])[arr_pos])
+        arr_null_refperc = self._dfC['refill_percent'].isnull().to_numpy()[arr_pos]
+        arr_aligned = arr_filled.copy()
+        arr_aligned[arr_null_refperc] = np.nan
+        self._dfC.iloc[arr_pos, self._dfC.columns.get_loc('intensity_aligned')] = arr_aligned
+
+        dfState = SumCountByDevice(np.zeros(arr_pos.size, dtype=int), pd.Index([dev]), 
+                                   arr_null_refperc, arr_aligned)
+        dfState['intensity_carry'] = arr_filled[-1]
+        dfState['timestamp_last'] = arr_ts[-1]
+        self.UpdateDeviceState(dfState)
+
+    def ConsolidateAppended(self):
+        """
+        Concatenate appended row blocks into _dfC (deferred so Append() stays O(new rows))
+
+        Each appended row goes right after its device's last existing row, so it
+        extends the device run Append() carried from (as a full transform would
+        align it); rows of new devices go at the end grouped by device. Appended
+        rows keep their order within each device
+        """
+        if len(self._lst_dfAppended) < 1: return
+        n_old = self._dfC.index.size
+        dfC = pd.concat([self._dfC] + self._lst_dfAppended)
+        self._lst_dfAppended = []
+
+        #Sort key: 2 x position for existing rows; 2 x (device's last position) + 1 appended
+        arr_codes = DeviceCodes(dfC['device_id'])[0] + 1
+        arr_last = np.full(arr_codes.max(initial=0) + 1, -1)
+        np.maximum.at(arr_last, arr_codes[:n_old], np.arange(n_old))
+        arr_pos = arr_last[arr_codes[n_old:]]
+        fil_new_dev = arr_pos < 0
+        arr_pos[fil_new_dev] = n_old + pd.factorize(arr_codes[n_old:][fil_new_dev])[0]
+        arr_order = np.argsort(np.concatenate([2 * np.arange(n_old), 2 * arr_pos + 1]), kind='stable')
+        if (arr_order[n_old:] != np.arange(n_old, arr_order.size)).any(): dfC = dfC.iloc[arr_order]
+        self._dfC = dfC
+        self._dfInput = None        #Caller's frame no longer holds all rows
+        self._arr_dev_codes = None
+        self.UpdateFilters()
+
+def DeviceCodes(ser_dev):
+    """
+    Integer codes for a device_id Series plus the device value for each code
+    (Uses existing codes for categorical input; otherwise codes in order of appearance)
+    """
+    if isinstance(ser_dev.dtype, pd.CategoricalDtype):
+        return ser_dev.cat.codes.to_numpy(), ser_dev.cat.categories
+    return pd.factorize(ser_dev, use_na_sentinel=False)
+
+def SortKeyCodes(ser):
+    """
+    Integer keys with the same sort order as a Series' values (categorical codes,
+    datetime int64 or sorted factorize codes; nulls sort first)
+    """
+    if isinstance(ser.dtype, pd.CategoricalDtype): return ser.cat.codes.to_numpy()
+    if ser.dtype.kind == 'M': return pd.DatetimeIndex(ser).asi8
+    return pd.factorize(ser, sort=True)[0]
+
+def IsOrderedWithinRuns(ser, arr_dev_change):
+    """
+    True if ser's values never decrease except at arr_dev_change rows. O(n)
+    adjacent comparison of raw values (datetime int64, categorical codes or
+    e.g. ISO timestamp strings); sort keys are built only if ser has nulls or
+    values that do not compare (nulls sort first as in SortKeyCodes)
+    """
+    if isinstance(ser.dtype, pd.CategoricalDtype): arr = ser.cat.codes.to_numpy()
+    elif ser.dtype.kind == 'M': arr = pd.DatetimeIndex(ser).asi8
+    elif ser.isna().any(): arr = SortKeyCodes(ser)
+    elif isinstance(ser.dtype, pd.StringDtype): arr = ser.array    #Compares in Arrow/C
+    else: arr = ser.to_numpy()
+    try:
+        IsAscending = np.asarray(arr[1:] >= arr[:-1], dtype=bool)
+    except TypeError:
+        arr = SortKeyCodes(ser)
+        IsAscending = arr[1:] >= arr[:-1]
+    return bool((IsAscending | arr_dev_change[1:]).all())
+
+def DeviceChangeArray(arr_dev):
+    """
+    Boolean array that is True for the first row of each device run
+    (Equivalent to df['device_id'] != df.shift(1)['device_id'])
+    """
+    arr_dev_change = np.empty(arr_dev.size, dtype=bool)
+    arr_dev_change[:1] = True
+    np.not_equal(arr_dev[1:], arr_dev[:-1], out=arr_dev_change[1:])
+    return arr_dev_change
+
+def FloatArray(ser):
+    """
+    Float NumPy values of a numeric Series with NaN for nulls (keeps float32)
+    """
+    dtype = np.float32 if ser.dtype == np.float32 else np.float64
+    return ser.to_numpy(dtype=dtype, na_value=np.nan)
+
+def FillDownBySegment(arr_dev_change, arr_vals, arr_seg_carry=None):
+    """
+    Forward fill arr_vals within device segments without crossing segment starts
+
+    A segment starts at row 0 and at each arr_dev_change row. The last non-null
+    position is carried with np.maximum.accumulate; rows whose last non-null
+    position precedes their segment start get the segment's arr_seg_carry value
+    (NaN if no carry array is given)
+    """
+    idx = np.arange(arr_vals.size)
+    arr_last = np.where(np.isnan(arr_vals), -1, idx)
+    np.maximum.accumulate(arr_last, out=arr_last)
+    arr_start = np.where(arr_dev_change, idx, 0)
+    np.maximum.accumulate(arr_start, out=arr_start)
+    IsFilled = arr_last >= arr_start
+
+    arr_out = arr_vals[arr_last]
+    if arr_seg_carry is None:
+        arr_out[~IsFilled] = np.nan
+    else:
+        arr_seg = np.cumsum(arr_dev_change) - arr_dev_change[:1].sum()
+        arr_out[~IsFilled] = arr_seg_carry[arr_seg[~IsFilled]]
+    return arr_out
+
+def AlignIntensityArrays(arr_dev_change, arr_null_refperc, arr_intensity, arr_seg_carry=None):
+    """
+    Align last-reported intensity onto populated refill percent rows by device
+    Returns the intensity_aligned array (NaN where refill percent is null)
+    """
+    arr_aligned = FillDownBySegment(arr_dev_change, arr_intensity, arr_seg_carry)
+    arr_aligned[arr_null_refperc] = np.nan
+    return arr_aligned
+
+def AlignIntensityLoop(arr_dev_change, arr_null_refperc, arr_intensity):
+    """
+    Per-row loop form of AlignIntensityArrays: carry last non-null intensity within
+    device and emit it on populated refill percent rows (compiled when numba is
+    installed; see AlignIntensityCompiled)
+    """
+    arr_aligned = np.empty_like(arr_intensity)
+    last = np.nan
+    for i in range(arr_intensity.size):
+        if arr_dev_change[i]: last = np.nan
+        if not np.isnan(arr_intensity[i]): last = arr_intensity[i]
+        arr_aligned[i] = np.nan if arr_null_refperc[i] else last
+    return arr_aligned
+
+AlignIntensityCompiled = numba.njit(cache=True)(AlignIntensityLoop) if IsNumba else None
+
+def SumCountByDevice(arr_dev_codes, idx_devs, arr_null_refperc, arr_aligned):
+    """
+    Per-device sum and count of intensity_aligned over populated refill rows
+    (Accumulator form of SummarizeIntensityByDevice for chunked/parallel runs)
+
+    Returns DataFrame indexed by device_id (all of idx_devs) with 'sum' and 'count' 
+    of non-null intensity_aligned and 'n_refill' populated refill percent rows
+    """
+    fil = ~arr_null_refperc & (arr_dev_codes >= 0)
+    arr_codes = arr_dev_codes[fil]
+    arr_vals = arr_aligned[fil]
+    fil_vals = ~np.isnan(arr_vals)
+    n = len(idx_devs)
+    dfSumCount = pd.DataFrame({'sum':np.bincount(arr_codes[fil_vals], arr_vals[fil_vals], n),
+                               'count':np.bincount(arr_codes[fil_vals], minlength=n),
+                               'n_refill':np.bincount(arr_codes, minlength=n)},
+                               index=idx_devs)
+    dfSumCount.index.name = 'device_id'
+    return dfSumCount
+
+def SummaryFromSumCount(dfSumCount):
+    """
+    By-device mean intensity (same form as _serSummIntensity) from summed accumulators
+    (Devices without populated refill percent rows are omitted as in groupby)
+    """
+    df = dfSumCount[dfSumCount['n_refill'] > 0]
+    ser = (df['sum'] / df['count'].where(df['count'] > 0)).round(2)
+    ser.name = 'intensity_aligned'
+    return ser.sort_index()
+
+def DecrementWeights(arr_dev_change, arr_refill):
+    """
+    Consumption weight per row: refill_percent decrement from the device's previous
+    populated refill row. 0 for non-refill rows, a device's first refill row and
+    increases (reservoir refills)
+    """
+    arr_prev = np.full(arr_refill.size, np.nan)
+    arr_prev[1:] = FillDownBySegment(arr_dev_change, arr_refill)[:-1]
+    arr_prev[arr_dev_change] = np.nan
+    arr_decr = arr_prev - arr_refill
+    return np.where(arr_decr > 0, arr_decr, 0.)
+
+def WeightedSumByDevice(arr_dev_codes, idx_devs, arr_null_refperc, arr_aligned, arr_weights):
+    """
+    Per-device weighted sum of intensity_aligned ('wsum'), total weight of rows with
+    non-null intensity_aligned ('weight') and populated refill rows ('n_refill')
+
+    One bincount pass per column over all rows (excluded rows get zero weight),
+    so no filtered subset is materialized. Codes shift by 1 so null devices (-1) 
+    drop out in slot 0
+    """
+    n = len(idx_devs) + 1
+    arr_bins = arr_dev_codes + 1
+    IsVal = ~np.isnan(arr_aligned) & ~arr_null_refperc
+    arr_w = np.where(IsVal, arr_weights, 0.)
+    arr_wx = np.where(IsVal, arr_aligned, 0.) * arr_w
+    dfWeighted = pd.DataFrame({'wsum':np.bincount(arr_bins, arr_wx, n)[1:],
+                               'weight':np.bincount(arr_bins, arr_w, n)[1:],
+                               'n_refill':np.bincount(arr_bins, ~arr_null_refperc, n)[1:]},
+                               index=idx_devs)
+    dfWeighted.index.name = 'device_id'
+    return dfWeighted
+
+def WindowStepOrigin(sFreq):
+    """
+    Window length and a window start to align on (both int ns) for WindowSummary.
+    Anchored weekly offsets ('W-SUN' weeks end Sunday, so start Monday) align on
+    a start weekday; fixed frequencies align on the epoch
+    """
+    offset = pd.tseries.frequencies.to_offset(sFreq)
+    if isinstance(offset, pd.offsets.Week) and offset.weekday is not None:
+        tsMonday = pd.Timestamp('1970-01-05')
+        return (pd.Timedelta(weeks=offset.n).value,
+                (tsMonday + pd.Timedelta(days=(offset.weekday + 1) % 7)).value)
+    return pd.Timedelta(sFreq).value, 0
+
+def RollingBinSum(arr_bins, iWidth):
+    """
+    Sum over trailing iWidth bins along axis 1 (sliding window ending at each bin,
+    plus iWidth-1 trailing windows that run past the last bin)
+    """
+    n_rows, n_bins = arr_bins.shape
+    arr_cum = np.zeros((n_rows, n_bins + iWidth))
+    np.cumsum(arr_bins, axis=1, out=arr_cum[:, 1:n_bins + 1])
+    arr_cum[:, n_bins + 1:] = arr_cum[:, n_bins:n_bins + 1]
+    arr_end = np.arange(1, n_bins + iWidth)
+    return arr_cum[:, arr_end] - arr_cum[:, np.maximum(arr_end - iWidth, 0)]
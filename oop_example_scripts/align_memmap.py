@@ -0,0 +1,133 @@
+#Version 10/17/26
+import os
+import pandas as pd
+import numpy as np
+import align_intensity
+
+#Column .npy files in a memmap store. device_id.npy holds int32 codes into devices.npy
+DICT_NPY_DTYPES = {'device_id':np.int32, 'timestamp':'datetime64[s]',
+                   'refill_percent':np.float32, 'intensity':np.float32}
+
+def CsvToNpy(sPF_csv, sPath_npy, iChunkRows=1_000_000):
+    """
+    Convert a device CSV (tests/data.csv schema) to a memmap store in sPath_npy
+
+    Two chunked passes so memory is bounded by chunk size plus the device list:
+    the first counts rows and codes device_id in order of appearance; the second
+    fills preallocated .npy memmaps (one per column in DICT_NPY_DTYPES). Row
+    order is kept, so input should be sorted by device_id and timestamp
+    Returns the number of rows written
+    """
+    os.makedirs(sPath_npy, exist_ok=True)
+    n_rows, dict_codes = 0, {}
+    for dfChunk in pd.read_csv(sPF_csv, usecols=['device_id'], chunksize=iChunkRows):
+        for dev in pd.unique(dfChunk['device_id']):
+            dict_codes.setdefault(dev, len(dict_codes))
+        n_rows += dfChunk.index.size
+    idx_devs = pd.Index(list(dict_codes), name='device_id')
+    np.save(sPath_npy + 'devices.npy', idx_devs.to_numpy(dtype=str))
+
+    dict_mm = {col:np.lib.format.open_memmap(sPath_npy + col + '.npy', mode='w+',
+                                             dtype=dtype, shape=(n_rows,))
+               for col, dtype in DICT_NPY_DTYPES.items()}
+    i0 = 0
+    for dfChunk in pd.read_csv(sPF_csv, chunksize=iChunkRows):
+        i1 = i0 + dfChunk.index.size
+        dict_mm['device_id'][i0:i1] = idx_devs.get_indexer(dfChunk['device_id'])
+        dict_mm['timestamp'][i0:i1] = pd.to_datetime(dfChunk['timestamp']).to_numpy()
+        for col in ['refill_percent', 'intensity']:
+            dict_mm[col][i0:i1] = align_intensity.FloatArray(dfChunk[col])
+        i0 = i1
+    for mm in dict_mm.values(): mm.flush()
+    return n_rows
+
+class MemmapIntensityByDecr():
+    """
+    Out-of-core SummIntensityByDecr over a memmap store written by CsvToNpy
+
+    Walks the column memmaps iBlockRows at a time and writes intensity_aligned
+    to its own memmapped .npy in the store. The last device of each block and
+    its last-reported intensity carry into the next block (as in
+    align_stream.StreamIntensityByDecr), so output matches an in-memory run.
+    Resident memory is a few block-sized temporaries plus one sum/count row per
+    device, independent of store size; the OS pages memmapped columns in and out
+
+    JDL 10/17/26
+    """
+    def __init__(self, sPath_npy, iBlockRows=1_000_000):
+        self.sPath_npy = sPath_npy
+        self.iBlockRows = iBlockRows
+        self.idx_devs = pd.Index(np.load(sPath_npy + 'devices.npy'), name='device_id')
+        self.dict_mm = {col:np.load(sPath_npy + col + '.npy', mmap_mode='r')
+                        for col in DICT_NPY_DTYPES}
+        self.n_rows = self.dict_mm['device_id'].size
+        self._dfSumCount = None         #By-device sum/count accumulators
+        self._IsTransformed = False
+
+    @property
+    def sPF_aligned(self):
+        return self.sPath_npy + 'intensity_aligned.npy'
+
+    @property
+    def arr_aligned(self):
+        """
+        Read-only memmap of intensity_aligned (aligns the store on first access)
+        """
+        self.CachedTransform()
+        return np.load(self.sPF_aligned, mmap_mode='r')
+
+    @property
+    def ser_summ_intensity(self):
+        """
+        By-device intensity summary (same form as SummIntensityByDecr.ser_summ_intensity)
+        """
+        self.CachedTransform()
+        return align_intensity.SummaryFromSumCount(self._dfSumCount)
+
+    def CachedTransform(self):
+        if not self._IsTransformed: self.AlignBlocks()
+
+    def AlignBlocks(self):
+        """
+        Align the store block by block into the intensity_aligned memmap
+        """
+        mm_out = np.lib.format.open_memmap(self.sPF_aligned, mode='w+',
+                                           dtype=np.float32, shape=(self.n_rows,))
+        self._dfSumCount = pd.DataFrame(0., index=self.idx_devs, columns=['sum', 'count', 'n_refill'])
+        code_open, intensity_open = -1, np.nan
+        for i0 in range(0, self.n_rows, self.iBlockRows):
+            i1 = min(i0 + self.iBlockRows, self.n_rows)
+            arr_codes = np.asarray(self.dict_mm['device_id'][i0:i1])
+            arr_dev_change = align_intensity.DeviceChangeArray(arr_codes)
+
+            #First segment continues the previous block's last device (if same device)
+            arr_seg_carry = np.full(np.count_nonzero(arr_dev_change[1:]) + 1, np.nan)
+            if arr_codes[0] == code_open:
+                arr_dev_change[0] = False
+                arr_seg_carry[0] = intensity_open
+
+            arr_null_refperc = np.isnan(self.dict_mm['refill_percent'][i0:i1])
+            arr_filled = align_intensity.FillDownBySegment(arr_dev_change,
+                                np.asarray(self.dict_mm['intensity'][i0:i1]), arr_seg_carry)
+            code_open, intensity_open = arr_codes[-1], arr_filled[-1]
+            arr_filled[arr_null_refperc] = np.nan
+
+            mm_out[i0:i1] = arr_filled
+            mm_out.flush()
+            self._dfSumCount += align_intensity.SumCountByDevice(arr_codes, self.idx_devs,
+                                                        arr_null_refperc, arr_filled)
+        del mm_out
+        self._IsTransformed = True
+
+    def ToDataFrame(self, i0=0, i1=None):
+        """
+        Rows i0:i1 of the store as a DataFrame in the SummIntensityByDecr.dfC layout
+        """
+        sl = slice(i0, i1)
+        df = pd.DataFrame({'device_id':self.idx_devs[self.dict_mm['device_id'][sl]],
+                           'timestamp':self.dict_mm['timestamp'][sl],
+                           'refill_percent':self.dict_mm['refill_percent'][sl],
+                           'intensity':self.dict_mm['intensity'][sl],
+                           'intensity_aligned':self.arr_aligned[sl]})
+        df.index = pd.RangeIndex(self.n_rows)[sl]
+        return df
@@ -0,0 +1,91 @@
+#Version 10/17/26
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import align_intensity
+
+class ParallelIntensityByDecr():
+    """
+    Process-pool version of SummIntensityByDecr sharded by device runs
+
+    Alignment resets at each device change, so the input is cut into shards of
+    about iShardRows rows at device run boundaries. Shards are aligned in
+    n_workers processes and results are merged back in original row order
+
+    JDL 10/17/26
+    """
+    def __init__(self, dfC_input, n_workers=None, iShardRows=1_000_000, sEngine='numpy'):
+        self._dfC = dfC_input
+        self.n_workers = n_workers      #None uses os.cpu_count()
+        self.iShardRows = iShardRows
+        self.sEngine = sEngine
+        self.lst_shards = []            #(start, stop) row offsets of each shard
+        self._dfSumCount = None         #By-device sum/count merged from shards
+        self._serSummIntensity = None
+        self._IsTransformed = False
+
+    @property
+    def ser_summ_intensity(self):
+        """
+        Summarize intensity by device from merged shard accumulators
+        """
+        self.CachedTransform()
+        return self._serSummIntensity
+
+    @property
+    def dfC(self):
+        """
+        Construct transformed dfC
+        """
+        self.CachedTransform()
+        return self._dfC
+
+    def CachedTransform(self):
+        if not self._IsTransformed: self.TransformProcedure()
+
+    def TransformProcedure(self):
+        """
+        Shard, align shards in the process pool and merge
+        """
+        self.SetShardBoundaries()
+        lst_results = self.RunShards()
+        self.MergeShards(lst_results)
+        self._IsTransformed = True
+
+    def SetShardBoundaries(self):
+        """
+        Cut rows into shards of ~iShardRows at the device run start at/after each cut
+        """
+        arr_codes, idx_devs = align_intensity.DeviceCodes(self._dfC['device_id'])
+        arr_seg_starts = np.flatnonzero(align_intensity.DeviceChangeArray(arr_codes))
+        n = self._dfC.index.size
+        arr_targets = np.arange(self.iShardRows, n, self.iShardRows)
+        idx = np.searchsorted(arr_seg_starts, arr_targets)
+        arr_cuts = np.unique(arr_seg_starts[idx[idx < arr_seg_starts.size]])
+        lst_bounds = [0] + list(arr_cuts[arr_cuts > 0]) + [n]
+        self.lst_shards = list(zip(lst_bounds[:-1], lst_bounds[1:]))
+
+    def RunShards(self):
+        """
+        Align each shard's input columns in a worker process; results in shard order
+        """
+        cols = ['device_id', 'refill_percent', 'intensity']
+        lst_dfs = [self._dfC.iloc[i:j][cols] for i, j in self.lst_shards]
+        with ProcessPoolExecutor(max_workers=self.n_workers) as executor:
+            return list(executor.map(AlignShard, lst_dfs, [self.sEngine] * len(lst_dfs)))
+
+    def MergeShards(self, lst_results):
+        """
+        Concatenate aligned shard arrays and combine by-device sum/count
+        """
+        self._dfC['intensity_aligned'] = np.concatenate([arr for arr, _ in lst_results])
+        dfSumCount = pd.concat([df for _, df in lst_results])
+        self._dfSumCount = dfSumCount.groupby(level=0).sum()
+        self._serSummIntensity = align_intensity.SummaryFromSumCount(self._dfSumCount)
+
+def AlignShard(dfShard, sEngine):
+    """
+    Worker: align one shard; return intensity_aligned array and by-device sum/count
+    """
+    align = align_intensity.SummIntensityByDecr(dfShard, sEngine=sEngine)
+    return align.dfC['intensity_aligned'].to_numpy(), align.SumCount()
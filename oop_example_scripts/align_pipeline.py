@@ -0,0 +1,40 @@
+#Version 10/17/26
+import pandas as pd
+import dfcache
+import align_intensity
+
+def LoadAlignedData(files, sEngine='numpy', cache=None):
+    """
+    Transformed dfC for files.sPF_data, reusing the on-disk columnar cache
+
+    Cache entries are keyed by input file content and TRANSFORM_VERSION; a hit
+    skips CSV parsing and the transform. Returns (dfC, IsCacheHit)
+    JDL 10/17/26
+    """
+    if cache is None: cache = dfcache.DataFrameCache(files.spathcache)
+    sKey = cache.Key(files.sPF_data, align_intensity.TRANSFORM_VERSION)
+    dfC = cache.Get(sKey)
+    if dfC is not None: return dfC, True
+
+    align = align_intensity.SummIntensityByDecr(pd.read_csv(files.sPF_data), sEngine=sEngine)
+    cache.Put(sKey, align.dfC)
+    return align.dfC, False
+
+def ReadDataCompact(files, IsReport=False):
+    """
+    Read files.sPF_data with the compact schema in files.dict_dtypes_data
+    (categorical device_id, nullable small-int refill_percent, float32 intensity
+    and datetime64 timestamp)
+
+    IsReport=True also reads with default dtypes and prints memory before/after
+    Returns (df, dict_mem) where dict_mem has bytes 'default' and 'compact'
+    JDL 10/17/26
+    """
+    df = pd.read_csv(files.sPF_data, dtype=files.dict_dtypes_data, 
+                     parse_dates=files.lst_datecols_data)
+    dict_mem = {'default':None, 'compact':int(df.memory_usage(deep=True).sum())}
+    if IsReport:
+        dict_mem['default'] = int(pd.read_csv(files.sPF_data).memory_usage(deep=True).sum())
+        print('memory bytes: default', dict_mem['default'], ' compact', dict_mem['compact'],
+              ' ratio', round(dict_mem['default'] / dict_mem['compact'], 1))
+    return df, dict_mem
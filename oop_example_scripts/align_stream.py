@@ -0,0 +1,183 @@
+#Version 10/17/26
+import asyncio
+import pandas as pd
+import numpy as np
+import align_intensity
+
+class StreamIntensityByDecr():
+    """
+    Chunked version of SummIntensityByDecr for device CSVs too large to load whole
+
+    Reads the CSV (tests/data.csv schema) iChunkRows at a time. The last device
+    of each chunk and its last-reported intensity carry into the next chunk so
+    aligned rows and the by-device summary match an in-memory run. Memory is
+    bounded by chunk size plus one sum/count row per device
+
+    JDL 10/17/26
+    """
+    def __init__(self, sPF_data, iChunkRows=1_000_000):
+        self.sPF_data = sPF_data
+        self.iChunkRows = iChunkRows
+        self.ResetState()
+
+    def ResetState(self):
+        """
+        Clear carry-over and summary accumulators before a new pass over the file
+        """
+        self._dev_open = None               #device_id of previous chunk's last row
+        self._intensity_open = np.nan       #Last-reported intensity for _dev_open
+        self._dfSumCount = None             #By-device sum/count accumulators
+        self.n_rows = 0
+        self.n_chunks = 0
+
+    @property
+    def ser_summ_intensity(self):
+        """
+        By-device intensity summary from accumulators (after a full pass)
+        """
+        return align_intensity.SummaryFromSumCount(self._dfSumCount)
+
+    def IterAlignedChunks(self):
+        """
+        Generator of aligned chunk DataFrames (input columns + intensity_aligned)
+        Summary accumulators update as each chunk is yielded
+        """
+        self.ResetState()
+        for dfChunk in pd.read_csv(self.sPF_data, chunksize=self.iChunkRows):
+            self.AlignChunk(dfChunk)
+            self.AccumulateSummary(dfChunk)
+            yield dfChunk
+
+    def AlignChunk(self, dfChunk):
+        """
+        Add intensity_aligned to a chunk, continuing the open device from prior chunk
+        """
+        arr_codes, self._idx_devs = align_intensity.DeviceCodes(dfChunk['device_id'])
+        arr_dev_change = align_intensity.DeviceChangeArray(arr_codes)
+        self._arr_codes = arr_codes
+
+        #First segment continues the previous chunk's last device (if same device)
+        arr_seg_carry = np.full(np.count_nonzero(arr_dev_change[1:]) + 1, np.nan)
+        if dfChunk.index.size > 0 and dfChunk['device_id'].iloc[0] == self._dev_open:
+            arr_dev_change[0] = False
+            arr_seg_carry[0] = self._intensity_open
+
+        arr_intensity = align_intensity.FloatArray(dfChunk['intensity'])
+        arr_filled = align_intensity.FillDownBySegment(arr_dev_change, arr_intensity, arr_seg_carry)
+        if dfChunk.index.size > 0:
+            self._dev_open = dfChunk['device_id'].iloc[-1]
+            self._intensity_open = arr_filled[-1]
+
+        self._arr_null_refperc = dfChunk['refill_percent'].isnull().to_numpy()
+        arr_filled[self._arr_null_refperc] = np.nan
+        dfChunk['intensity_aligned'] = arr_filled
+        return dfChunk
+
+    def AccumulateSummary(self, dfChunk):
+        """
+        Add a chunk's by-device sum/count of intensity_aligned to the accumulators
+        """
+        dfSumCount = align_intensity.SumCountByDevice(self._arr_codes, self._idx_devs,
+                        self._arr_null_refperc, dfChunk['intensity_aligned'].to_numpy())
+        if self._dfSumCount is None:
+            self._dfSumCount = dfSumCount
+        else:
+            self._dfSumCount = self._dfSumCount.add(dfSumCount, fill_value=0)
+        self.n_rows += dfChunk.index.size
+        self.n_chunks += 1
+
+    def WriteAlignedCsv(self, sPF_out):
+        """
+        Stream aligned chunks to a CSV file and return the by-device summary
+        """
+        IsHeader = True
+        for dfChunk in self.IterAlignedChunks():
+            dfChunk.to_csv(sPF_out, mode='w' if IsHeader else 'a', header=IsHeader, index=False)
+            IsHeader = False
+        return self.ser_summ_intensity
+
+class AsyncAlignPipeline():
+    """
+    asyncio pipeline overlapping CSV chunk reads, alignment and output writes
+
+    Three stages connected by bounded queues (iQueueSize chunks each): reading
+    the next chunk (or next file), aligning the current chunk with a
+    StreamIntensityByDecr and writing the previous aligned chunk. Blocking
+    pandas calls run in worker threads. Full queues block upstream stages
+    (backpressure), so at most ~2 * iQueueSize + 3 chunks are held in memory
+
+    lst_sPF_pairs is a list of (input csv, output csv) paths, such as
+    [(files.sPF_data, files.sPF_data_out)]. Each file is aligned independently
+    JDL 10/17/26
+    """
+    def __init__(self, lst_sPF_pairs, iChunkRows=1_000_000, iQueueSize=2):
+        self.lst_sPF_pairs = lst_sPF_pairs
+        self.iChunkRows = iChunkRows
+        self.iQueueSize = iQueueSize
+        self.dict_summaries = {}        #Output path: by-device intensity summary
+        self.n_chunks = 0
+
+    def Run(self):
+        """
+        Run the pipeline to completion; returns by-device summaries per output file
+        """
+        return asyncio.run(self.RunAsync())
+
+    async def RunAsync(self):
+        q_read = asyncio.Queue(maxsize=self.iQueueSize)
+        q_write = asyncio.Queue(maxsize=self.iQueueSize)
+        await asyncio.gather(self.ReadStage(q_read), self.AlignStage(q_read, q_write),
+                             self.WriteStage(q_write))
+        return self.dict_summaries
+
+    async def ReadStage(self, q_read):
+        """
+        Read chunks of each input file in order; None marks end of all input
+        """
+        for iFile, (sPF_in, _) in enumerate(self.lst_sPF_pairs):
+            reader = pd.read_csv(sPF_in, chunksize=self.iChunkRows)
+            while True:
+                dfChunk = await asyncio.to_thread(next, reader, None)
+                if dfChunk is None: break
+                await q_read.put((iFile, dfChunk))
+            reader.close()
+        await q_read.put(None)
+
+    async def AlignStage(self, q_read, q_write):
+        """
+        Align chunks in order, carrying device state within each file
+        """
+        iFile, stream = -1, None
+        while True:
+            item = await q_read.get()
+            if item is None: break
+            if item[0] != iFile:
+                self.RecordSummary(iFile, stream)
+                iFile = item[0]
+                stream = StreamIntensityByDecr(self.lst_sPF_pairs[iFile][0], self.iChunkRows)
+            await asyncio.to_thread(self.AlignChunk, stream, item[1])
+            await q_write.put(item)
+        self.RecordSummary(iFile, stream)
+        await q_write.put(None)
+
+    def AlignChunk(self, stream, dfChunk):
+        stream.AlignChunk(dfChunk)
+        stream.AccumulateSummary(dfChunk)
+
+    def RecordSummary(self, iFile, stream):
+        if stream is None: return
+        self.dict_summaries[self.lst_sPF_pairs[iFile][1]] = stream.ser_summ_intensity
+
+    async def WriteStage(self, q_write):
+        """
+        Write aligned chunks; first chunk of each file creates the output with header
+        """
+        iFile = -1
+        while True:
+            item = await q_write.get()
+            if item is None: break
+            IsNewFile = item[0] != iFile
+            iFile = item[0]
+            await asyncio.to_thread(item[1].to_csv, self.lst_sPF_pairs[iFile][1], 
+                    mode='w' if IsNewFile else 'a', header=IsNewFile, index=False)
+            self.n_chunks += 1
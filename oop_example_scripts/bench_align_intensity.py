@@ -0,0 +1,233 @@
+#Version 10/17/26
+#python bench_align_intensity.py --rows 1e3 1e4 1e5 1e6 1e7 [--out results.json]
+#python bench_align_intensity.py --compare base.json new.json
+
+#Set home (projname_scripts) Path and import needed libraries
+import pandas as pd
+import numpy as np
+import sys, os, time
+import json, argparse, subprocess, datetime
+from pathlib import Path
+sPathHome = str(Path(__file__).parent)
+if not sPathHome in sys.path: sys.path.append(sPathHome)
+sPathLibs = sPathHome + os.sep + 'libs'
+if not sPathLibs in sys.path: sys.path.append(sPathLibs)
+import align_intensity
+import align_parallel
+
+#TransformProcedure + summary steps in call order (pandas engine)
+LST_STEPS = ['AddIntensityAlignedCol', 'UpdateFilters', 'FillDownDecrIntensity', 'UpdateFilters', 'ClearUnneededValues',
+             'SummarizeIntensityByDevice']
+
+def SyntheticDeviceData(n_rows, n_devices=None, iSeed=0, IsCategorical=False):
+    """
+    Synthetic telemetry with the patterns in tests/data.csv, sorted by device/timestamp
+
+    * Many devices (default one per ~1000 rows), each with a contiguous run of rows
+    * ~35% refill rows with refill_percent stepping down by 1 (back to 100 after 0)
+    * Sparse (~10%) intensity reports; ~2% of refill rows also report intensity
+    * Unrelated events are blank in both columns
+    * ~20% of rows repeat the previous row's timestamp (duplicate timestamps)
+    IsCategorical=True stores device_id as category (needed for 1e8-row runs)
+    JDL 10/17/26
+    """
+    rng = np.random.default_rng(iSeed)
+    if n_devices is None: n_devices = max(n_rows // 1000, 3)
+    n_devices = min(n_devices, n_rows)
+    arr_dev = np.sort(np.r_[np.arange(n_devices), 
+                            rng.integers(0, n_devices, n_rows - n_devices)]).astype(np.int32)
+
+    #Event type per row: refill, intensity or unrelated
+    arr_u = rng.random(n_rows)
+    IsRefill = arr_u < 0.35
+    IsIntensity = (arr_u >= 0.35) & (arr_u < 0.45) | (arr_u < 0.007)
+
+    #refill_percent counts down within device from a random start level
+    arr_dev_start = np.flatnonzero(np.r_[True, arr_dev[1:] != arr_dev[:-1]])
+    arr_ct = np.cumsum(IsRefill)
+    arr_ct = arr_ct - (arr_ct - IsRefill)[arr_dev_start][arr_dev]
+    arr_level0 = rng.integers(10, 101, n_devices)[arr_dev]
+    arr_refill = np.where(IsRefill, (arr_level0 - arr_ct) % 101, np.nan)
+    arr_intensity = np.where(IsIntensity, rng.integers(1, 11, n_rows), np.nan)
+
+    #Timestamps increase within device from a common start (devices overlap in time);
+    #~20% duplicate the prior row's timestamp
+    arr_step = np.where(rng.random(n_rows) < 0.2, 0, rng.integers(1, 3600, n_rows))
+    arr_sec = np.cumsum(arr_step)
+    arr_sec -= arr_sec[arr_dev_start][arr_dev]
+    arr_ts = np.datetime64('2022-06-08', 's') + arr_sec.astype('timedelta64[s]')
+
+    lst_devs = ['DSN_' + str(i).zfill(7) for i in range(n_devices)]
+    if IsCategorical:
+        ser_dev = pd.Categorical.from_codes(arr_dev, categories=lst_devs)
+    else:
+        ser_dev = np.array(lst_devs, dtype=object)[arr_dev]
+    return pd.DataFrame({'device_id':ser_dev, 'timestamp':arr_ts,
+                         'refill_percent':arr_refill, 'intensity':arr_intensity})
+
+def TimeCall(func, iRepeats=1, Setup=None):
+    """
+    Best-of-iRepeats wall time in seconds for func() or func(Setup()) 
+    (Setup runs untimed before each call to give func fresh state)
+    """
+    lst_secs = []
+    for i in range(iRepeats):
+        args = () if Setup is None else (Setup(),)
+        tstart = time.perf_counter()
+        func(*args)
+        lst_secs.append(time.perf_counter() - tstart)
+    return min(lst_secs)
+
+def TimeSteps(df):
+    """
+    Time each SummIntensityByDecr method separately in TransformProcedure order
+    """
+    align = align_intensity.SummIntensityByDecr(df.copy())
+    dict_secs = {}
+    for step in LST_STEPS:
+        sKey = step if step not in dict_secs else step + '_2'
+        dict_secs[sKey] = TimeCall(getattr(align, step))
+    dict_secs['BuildSegmentIndex'] = TimeCall(lambda align: align.BuildSegmentIndex(),
+                                    Setup=lambda: align_intensity.SummIntensityByDecr(df))
+    return dict_secs
+
+def TimeProperties(df, sEngine, iRepeats=1):
+    """
+    Time end-to-end dfC and ser_summ_intensity on fresh instances, plus cached re-access
+    """
+    NewAlign = lambda: align_intensity.SummIntensityByDecr(df.copy(), sEngine=sEngine)
+    dict_secs = {}
+    dict_secs['dfC'] = TimeCall(lambda align: align.dfC, iRepeats, NewAlign)
+    dict_secs['ser_summ_intensity'] = TimeCall(lambda align: align.ser_summ_intensity, 
+                                               iRepeats, NewAlign)
+    align = NewAlign()
+    align.ser_summ_intensity
+    dict_secs['cached_access'] = TimeCall(lambda: (align.dfC, align.ser_summ_intensity), iRepeats)
+    return dict_secs
+
+def RunSuite(lst_rows, lst_engines=('pandas', 'numpy'), IsCategorical=False):
+    """
+    Benchmark steps and properties over increasing row counts; returns results dict
+    """
+    lst_results = []
+    for n_rows in lst_rows:
+        df = SyntheticDeviceData(n_rows, IsCategorical=IsCategorical)
+        iRepeats = 3 if n_rows <= 1_000_000 else 1
+        dict_row = {'n_rows':n_rows, 'steps':TimeSteps(df)}
+        for sEngine in lst_engines:
+            dict_row[sEngine] = TimeProperties(df, sEngine, iRepeats)
+        lst_results.append(dict_row)
+        print(n_rows, 'rows  end-to-end ser_summ_intensity (s):', 
+              {sEngine:round(dict_row[sEngine]['ser_summ_intensity'], 4) for sEngine in lst_engines})
+        del df
+    return {'meta':BenchMeta(IsCategorical), 'results':lst_results}
+
+def BenchMeta(IsCategorical):
+    """
+    Commit, date and library versions for a results file
+    """
+    try:
+        sCommit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=sPathHome,
+                                 capture_output=True, text=True).stdout.strip()
+    except OSError:
+        sCommit = ''
+    return {'commit':sCommit, 'date':datetime.datetime.now().isoformat(timespec='seconds'),
+            'python':sys.version.split()[0], 'pandas':pd.__version__, 'numpy':np.__version__,
+            'cpus':os.cpu_count(), 'categorical':IsCategorical}
+
+def WriteResults(dict_bench, sPF_out=None):
+    """
+    Persist results as JSON (default name includes commit for cross-commit comparison)
+    """
+    if sPF_out is None: sPF_out = 'bench_align_intensity_' + dict_bench['meta']['commit'] + '.json'
+    with open(sPF_out, 'w') as f:
+        json.dump(dict_bench, f, indent=1)
+    return sPF_out
+
+def CompareResults(sPF_base, sPF_new):
+    """
+    Print new/base time ratios for each row count and timing (>1 is slower)
+    """
+    lst_dicts = []
+    for sPF in [sPF_base, sPF_new]:
+        with open(sPF) as f: lst_dicts.append(json.load(f))
+    dict_base = {r['n_rows']:r for r in lst_dicts[0]['results']}
+    print('base', lst_dicts[0]['meta']['commit'], ' new', lst_dicts[1]['meta']['commit'])
+    df = pd.DataFrame([FlattenTimings(r, dict_base[r['n_rows']])
+                       for r in lst_dicts[1]['results'] if r['n_rows'] in dict_base])
+    print(df.round(2).to_string())
+    return df
+
+def FlattenTimings(dict_new, dict_base):
+    """
+    Ratio new/base for every timing present in both result rows
+    """
+    dict_ratio = {'n_rows':dict_new['n_rows']}
+    for sGroup, dict_secs in dict_new.items():
+        if not isinstance(dict_secs, dict) or sGroup not in dict_base: continue
+        for sKey, secs in dict_secs.items():
+            if sKey in dict_base[sGroup]:
+                dict_ratio[sGroup + '.' + sKey] = secs / dict_base[sGroup][sKey]
+    return dict_ratio
+
+def CompareEngines(n_rows):
+    """
+    Time transform engines against the pandas procedure and check that output matches
+    ('numba' only when installed; otherwise it would just repeat the numpy timing)
+    """
+    df = SyntheticDeviceData(n_rows)
+    lst_engines = ['pandas', 'numpy'] + (['numba'] if align_intensity.IsNumba else [])
+    dict_secs = {}
+    dict_aligned = {}
+    for sEngine in lst_engines:
+        if sEngine == 'numba':
+            #Compile outside the timed call
+            align_intensity.SummIntensityByDecr(df.head(100).copy(), sEngine=sEngine).dfC
+        align = align_intensity.SummIntensityByDecr(df.copy(), sEngine=sEngine)
+        dict_secs[sEngine] = TimeCall(lambda: align.dfC)
+        dict_aligned[sEngine] = align._dfC['intensity_aligned'].to_numpy()
+
+    print('rows:', n_rows)
+    for sEngine, secs in dict_secs.items():
+        IsMatch = np.array_equal(dict_aligned['pandas'], dict_aligned[sEngine], equal_nan=True)
+        print(f"{sEngine: <10}", round(secs, 3), 's  speedup vs pandas:',
+              round(dict_secs['pandas'] / secs, 1), 'x  match:', IsMatch)
+    return dict_secs
+
+def ScaleWorkers(n_rows, lst_workers=None, iShardRows=1_000_000):
+    """
+    Time ParallelIntensityByDecr for increasing worker counts (serial numpy as baseline)
+    """
+    df = SyntheticDeviceData(n_rows)
+    if lst_workers is None: lst_workers = [2 ** i for i in range(7) if 2 ** i <= os.cpu_count()]
+    secs_serial = TimeCall(lambda: align_intensity.SummIntensityByDecr(df.copy(), sEngine='numpy').dfC)
+    print('rows:', n_rows, ' cpus:', os.cpu_count(), ' serial numpy:', round(secs_serial, 3), 's')
+    dict_secs = {}
+    for n_workers in lst_workers:
+        par = align_parallel.ParallelIntensityByDecr(df.copy(), n_workers, iShardRows)
+        dict_secs[n_workers] = TimeCall(lambda: par.dfC)
+        print(f"workers {n_workers: <4}", round(dict_secs[n_workers], 3), 's  speedup vs serial:',
+              round(secs_serial / dict_secs[n_workers], 2), 'x')
+    return dict_secs
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='align_intensity benchmarks')
+    parser.add_argument('--rows', nargs='+', type=float, default=[1e3, 1e4, 1e5, 1e6, 1e7])
+    parser.add_argument('--out', default=None, help='results JSON path')
+    parser.add_argument('--categorical', action='store_true', help='category device_id')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), default=None)
+    parser.add_argument('--engines', nargs=1, type=float, default=None, metavar='N_ROWS',
+                        help='pandas vs numpy/numba engine comparison only')
+    parser.add_argument('--workers', nargs=1, type=float, default=None, metavar='N_ROWS',
+                        help='parallel worker scaling only')
+    args = parser.parse_args()
+
+    if args.compare is not None:
+        CompareResults(*args.compare)
+    elif args.engines is not None:
+        CompareEngines(int(args.engines[0]))
+    elif args.workers is not None:
+        ScaleWorkers(int(args.workers[0]))
+    else:
+        dict_bench = RunSuite([int(n) for n in args.rows], IsCategorical=args.categorical)
+        print('results:', WriteResults(dict_bench, args.out))
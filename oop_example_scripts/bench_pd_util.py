@@ -0,0 +1,135 @@
+#Version 10/17/26
+#python bench_pd_util.py --rows 1e5 1e6 1e7
+
+#Set home (projname_scripts) Path and import needed libraries
+import pandas as pd
+import numpy as np
+import sys, os
+import argparse
+from pathlib import Path
+sPathHome = str(Path(__file__).parent)
+if not sPathHome in sys.path: sys.path.append(sPathHome)
+sPathLibs = sPathHome + os.sep + 'libs'
+if not sPathLibs in sys.path: sys.path.append(sPathLibs)
+import util
+import pd_util
+from bench_align_intensity import TimeCall
+
+#Per-element (Series.map) reference versions of vectorized pd_util functions
+def RecodeFlagColToBooleanMap(df, sCol):
+    df[sCol] = df[sCol].map(lambda x: False if util.IsNullVal(x) else True)
+    return df
+
+def RecodeFlagColToOnesMap(df, sCol):
+    df[sCol] = df[sCol].map(lambda x: 1 if x else np.nan)
+    return df
+
+def RecodeFlagColToOnesZeroesMap(df, sCol):
+    df[sCol] = df[sCol].map(lambda x: 1 if x else 0)
+    return df
+
+def EvalColEval(df, col):
+    df[col] = df[col].apply(lambda x: EvalAllEval(x))
+    return df
+
+def EvalAllEval(st):
+    try:
+        return eval(str(st))
+    except:
+        return st
+
+def SyntheticJSONCol(n_rows, fUnique=0.1, iSeed=0):
+    """
+    Nested dict/list JSON cells (fUnique fraction distinct) with ~5% blank cells
+    """
+    rng = np.random.default_rng(iSeed)
+    n_unique = max(int(n_rows * fUnique), 1)
+    lst_json = ['{"id": ' + str(i) + ', "vals": [' + str(i % 7) + ', ' + str(i % 11) + 
+                '], "meta": {"mode": "m' + str(i % 3) + '", "level": ' + str(i % 5 / 2) + '}}'
+                for i in range(n_unique)]
+    arr = np.array(lst_json, dtype=object)[rng.integers(0, n_unique, n_rows)]
+    arr[rng.random(n_rows) < 0.05] = np.nan
+    return pd.DataFrame({'payload':arr})
+
+def CompareEvalCol(n_rows, fUnique=0.1):
+    """
+    Time eval-based vs cached safe-parse EvalCol; check outputs match
+    """
+    df = SyntheticJSONCol(n_rows, fUnique)
+    dict_df = {}
+    dict_secs = {}
+    for sKey, Func in [('eval', EvalColEval),
+                       ('parser', pd_util.EvalCol)]:
+        dict_secs[sKey] = TimeCall(lambda dfC: dict_df.update({sKey:Func(dfC, 'payload')}),
+                                   Setup=lambda: df.copy())
+    IsMatch = dict_df['eval']['payload'].tolist() == dict_df['parser']['payload'].tolist()
+    print('rows:', n_rows, ' unique fraction:', fUnique, ' eval:', round(dict_secs['eval'], 3),
+          's  parser:', round(dict_secs['parser'], 3), 's  speedup:',
+          round(dict_secs['eval'] / dict_secs['parser'], 1), 'x  match:', IsMatch)
+    return dict_secs
+
+def CompareDelimitedPipeline(n_rows, n_cols=4, lst_workers=(1, None)):
+    """
+    Time DelimitedColsPipeline in process vs process pool on n_cols name=value columns
+    """
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'key':np.arange(n_rows), 'other':rng.random(n_rows)})
+    for i in range(n_cols):
+        df['col' + str(i)] = [';'.join('p' + str(j) + '=' + str(v) for j, v in enumerate(arr))
+                              for arr in rng.integers(0, 9, (n_rows, 10))]
+    lst_specs = [('col' + str(i), [';', '=']) for i in range(n_cols)]
+    dict_secs = {}
+    for n_workers in lst_workers:
+        pipeline = pd_util.DelimitedColsPipeline(['key'], lst_specs, n_workers, IsPrefixCols=True)
+        dict_secs[n_workers] = TimeCall(lambda: pipeline.Run(df))
+        print('rows:', n_rows, ' cols:', n_cols, ' workers:', n_workers, ' cpus:', os.cpu_count(),
+              round(dict_secs[n_workers], 3), 's')
+    return dict_secs
+
+def SyntheticFlagData(n_rows, iSeed=0):
+    """
+    1/blank flag (float), Boolean flag and mixed object flag columns
+    """
+    rng = np.random.default_rng(iSeed)
+    arr_u = rng.random(n_rows)
+    arr_obj = np.where(arr_u < 0.3, None, 1).astype(object)
+    arr_obj[arr_u > 0.9] = np.nan
+    return pd.DataFrame({'flag_ones':np.where(arr_u < 0.5, 1., np.nan),
+                         'flag_bool':arr_u < 0.5,
+                         'flag_obj':arr_obj})
+
+def CompareRecodeFlags(n_rows):
+    """
+    Time map-based vs vectorized flag recoders per column; check outputs match exactly
+    """
+    df = SyntheticFlagData(n_rows)
+    lst_pairs = [(RecodeFlagColToBooleanMap, pd_util.RecodeFlagColToBoolean, 'flag_ones'),
+                 (RecodeFlagColToBooleanMap, pd_util.RecodeFlagColToBoolean, 'flag_obj'),
+                 (RecodeFlagColToOnesMap, pd_util.RecodeFlagColToOnes, 'flag_bool'),
+                 (RecodeFlagColToOnesZeroesMap, pd_util.RecodeFlagColToOnesZeroes, 'flag_bool')]
+    lst_rows = []
+    for MapFunc, VecFunc, col in lst_pairs:
+        dict_df = {}
+        dict_secs = {}
+        for sKey, Func in [('map', MapFunc), ('vectorized', VecFunc)]:
+            dict_secs[sKey] = TimeCall(lambda dfC: dict_df.update({sKey:Func(dfC, col)}),
+                                       Setup=lambda: df[[col]].copy())
+        IsMatch = dict_df['map'].equals(dict_df['vectorized']) and \
+                  (dict_df['map'].dtypes == dict_df['vectorized'].dtypes).all()
+        lst_rows.append({'func':VecFunc.__name__, 'col':col, 'map':dict_secs['map'],
+                         'vectorized':dict_secs['vectorized'],
+                         'speedup':dict_secs['map'] / dict_secs['vectorized'], 'match':IsMatch})
+    dfResults = pd.DataFrame(lst_rows)
+    print('rows:', n_rows)
+    print(dfResults.round(4).to_string(index=False))
+    return dfResults
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='pd_util benchmarks')
+    parser.add_argument('--rows', nargs='+', type=float, default=[1e5, 1e6])
+    args = parser.parse_args()
+    for n_rows in args.rows:
+        CompareRecodeFlags(int(n_rows))
+        for fUnique in [1., 0.1]:
+            CompareEvalCol(int(n_rows), fUnique)
+        CompareDelimitedPipeline(int(n_rows))
@@ -0,0 +1,78 @@
+#Version 10/17/26
+import os, glob
+import hashlib
+
+#Feather (Arrow IPC) storage needs pyarrow; cache is disabled without it
+try:
+    import pyarrow as pa
+    from pyarrow import feather
+    IsPyArrow = True
+except ImportError:
+    IsPyArrow = False
+
+class DataFrameCache():
+    """
+    Columnar on-disk cache of DataFrames keyed by input file content + version
+
+    Entries are uncompressed Feather files in sPathCache read back with memory
+    mapping. Get() refreshes an entry's mtime so Evict() removes least recently
+    used entries once total size exceeds iMaxBytes
+    JDL 10/17/26
+    """
+    def __init__(self, sPathCache, iMaxBytes=2 * 1024 ** 3):
+        self.sPathCache = sPathCache
+        self.iMaxBytes = iMaxBytes
+        self.IsEnabled = IsPyArrow
+        self.dict_stats = {'hits':0, 'misses':0, 'evicted':0}
+
+    def Key(self, sPF_input, sVersion):
+        """
+        Cache key from hash of input file bytes and a transform version string
+        """
+        h = hashlib.blake2b(digest_size=16)
+        h.update(str(sVersion).encode())
+        with open(sPF_input, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(block)
+        return h.hexdigest()
+
+    def PathEntry(self, sKey):
+        return self.sPathCache + sKey + '.feather'
+
+    def Get(self, sKey):
+        """
+        Return cached DataFrame for sKey (memory-mapped read) or None if absent
+        """
+        sPF = self.PathEntry(sKey)
+        if not self.IsEnabled or not os.path.isfile(sPF):
+            self.dict_stats['misses'] += 1
+            return None
+        self.dict_stats['hits'] += 1
+        os.utime(sPF)
+        return feather.read_table(sPF, memory_map=True).to_pandas()
+
+    def Put(self, sKey, df):
+        """
+        Write DataFrame for sKey then evict old entries over the size cap
+        """
+        if not self.IsEnabled: return
+        os.makedirs(self.sPathCache, exist_ok=True)
+        sPF = self.PathEntry(sKey)
+        feather.write_feather(pa.Table.from_pandas(df), sPF + '.tmp', compression='uncompressed')
+        os.replace(sPF + '.tmp', sPF)
+        self.Evict(sKeep=sKey)
+
+    def Evict(self, sKeep=''):
+        """
+        Delete least recently used entries until cache size is within iMaxBytes
+        """
+        lst_entries = [(os.path.getmtime(f), os.path.getsize(f), f)
+                       for f in glob.glob(self.sPathCache + '*.feather')]
+        iBytes = sum(size for _, size, _ in lst_entries)
+        for _, size, f in sorted(lst_entries):
+            if iBytes <= self.iMaxBytes: break
+            if f == self.PathEntry(sKeep): continue
+            os.remove(f)
+            iBytes -= size
+            self.dict_stats['evicted'] += 1
+        return iBytes
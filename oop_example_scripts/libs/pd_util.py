@@ -1,9 +1,24 @@
 #Version 8/30/21 - Added JSON parse functions
 import pandas as pd
 import numpy as np
-
-#Import JDL utility modules
-import colinfo
+import os
+import json
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+#Arrow compute kernels split name/value pairs in C (join-and-split in Python without pyarrow)
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    IsPyArrow = True
+except ImportError:
+    IsPyArrow = False
+
+#Import JDL utility modules (colinfo is only needed by ImportDataFrame*)
+try:
+    import colinfo
+except ImportError:
+    colinfo = None
 import util
 
 def SubsetToFilter(df, fil):
@@ -24,6 +39,7 @@ def ImportDataFrame2(tbl_cls, file, dir_colinfo):
     Set data types on import
     JDL 9/28/20
     """
+    if colinfo is None: raise ImportError('ImportDataFrame requires the colinfo library')
     df = pd.read_csv(file)
     ColInfo = colinfo.ReadColInfoFromFile(dir_colinfo)
     colinfo.CI_RenameColsFromImport(ColInfo, df)
@@ -35,6 +51,7 @@ def ImportDataFrame(tbl_cls, file):
     Import a DataFrame from csv. Rename columns to ColInfo Names. Filter to keepcols
     JDL 7/21/20
     """
+    if colinfo is None: raise ImportError('ImportDataFrame requires the colinfo library')
     df = pd.read_csv(file)
     ColInfo = colinfo.ReadColInfoFromFile('libs/colinfo.csv')
     colinfo.CI_RenameColsFromImport(ColInfo, df)
@@ -184,25 +201,45 @@ def SplitAndStack(df, lst_keys, splitcol, sDelim, sIDCol):
     Return: Reshaped DataFrame with keycols, a new ID col and splitcol as columns
             (Combo of keycols and new ID col uniquely identify each row)
 
-    JDL 8/2/21
+    Long format is built directly from the split lists (explode), so no wide
+    frame padded to the longest row is materialized; null splitcol rows drop out
+
+    JDL 8/2/21; explode-based 10/17/26
     """    
-    #Make a copy that has only the key columns and split column
-    dftemp = df.copy().loc[:, lst_keys + [splitcol]]
-    
-    #Set the key columns as index; split and stack
-    dftemp = dftemp.set_index(lst_keys)
-    dftemp = dftemp[splitcol].str.split(sDelim, expand=True)
-    ser = dftemp.stack()
-    ser.index.names = lst_keys + [sIDCol]
-    
-    #Turn the stacked series back into DataFrame by converting Series index to columns
-    dftemp = ser.reset_index()
-    dftemp = dftemp.rename(columns={0:splitcol})
-    
-    #Return without stack order integer column
-    #return dftemp.loc[:, lst_keys + [splitcol]]
+    arr_rows, arr_ids, arr_vals = SplitElements(df[splitcol], sDelim)
+
+    #Keys repeated per element, then ID and split elements as columns
+    dftemp = df[lst_keys].iloc[arr_rows].reset_index(drop=True)
+    dftemp[sIDCol] = arr_ids
+    dftemp[splitcol] = pd.Series(arr_vals, dtype=object).astype(df[splitcol].dtype)
     return dftemp
 
+def SplitElements(ser, sDelim):
+    """
+    Split a delimited string Series into long-format NumPy arrays: row position of
+    each element, its position within the row (ID) and its value. Rows with null
+    or non-string values (which str.split leaves null) have no elements
+
+    JDL 10/17/26
+    """
+    arr_pos = np.flatnonzero(StringCellsFilter(ser))
+    if arr_pos.size < 1: return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=object)
+    ser_split = ser.iloc[arr_pos].str.split(sDelim)
+    arr_lens = np.fromiter(map(len, ser_split), dtype=np.int64, count=ser_split.size)
+    arr_rows = np.repeat(arr_pos, arr_lens)
+
+    #Element position within each row's list is the new ID
+    arr_starts = np.cumsum(arr_lens) - arr_lens
+    arr_ids = np.arange(arr_rows.size) - np.repeat(arr_starts, arr_lens)
+    return arr_rows, arr_ids, ser_split.explode().to_numpy()
+
+def StringCellsFilter(ser):
+    """
+    Boolean array that is True for string cells of a Series (not null, number, list...)
+    """
+    if isinstance(ser.dtype, pd.StringDtype): return ser.notna().to_numpy()
+    return np.fromiter((isinstance(val, str) for val in ser.to_numpy(dtype=object)),
+                       dtype=bool, count=ser.size)
 
 def SubSplitColumnAndJoin(df, lst_keys, sSplitCol, sDelim1, sDelim2):
     """
@@ -220,31 +257,101 @@ def SubSplitColumnAndJoin(df, lst_keys, sSplitCol, sDelim1, sDelim2):
     Return: Reshaped DataFrame with keycols, a new ID col and splitcol as columns
             (Combo of keycols and new ID col uniquely identify each row)
 
-    JDL 8/2/21
-    """    
-    #Set keys as index; split specified column into multiple columns having integer names
-    df2 = df.set_index(lst_keys).copy()
-    df2 = df2[sSplitCol].str.split(sDelim1, expand=True)
-    
-    #Iteratively sub-split integer-named columns; merge into combined DataFrame
-    dfFinal = pd.DataFrame()
-    for col in df2.columns:
-
-        #Sub-split on the specified delimiter
-        dftemp = df2[col].str.split(sDelim2, expand=True)
-
-        #Use the first row's value as column name (Note: assumes same name for all rows)
-        dftemp = dftemp.rename(columns={1:dftemp[0].iloc[0]})
-        dftemp = dftemp.drop(0, axis=1)
-
-        #Create a new DataFrame with expanded columns
-        if dfFinal.index.size < 1:
-            dfFinal = dftemp
-        else:
-            dfFinal = dfFinal.merge(dftemp,left_index=True, right_index=True)
-    
-    return dfFinal.reset_index(drop=False)
+    All name<sDelim2>value elements are split in one vectorized pass (at the
+    first sDelim2) and scattered once into a rows x names array (no per-column
+    merges), so rows may have different or reordered names.
+    Columns are names in order of first appearance; a row missing a name gets
+    NaN; elements without sDelim2 are ignored; a repeated name keeps the last value
 
+    JDL 8/2/21; single-pass 10/17/26
+    """    
+    #Name code/value of every element in one pass over the column
+    arr_rows, arr_codes, idx_names, arr_vals = SplitNameValuePairs(df[sSplitCol], sDelim1, sDelim2)
+
+    #Scatter values into one rows x names array (last value wins for repeated names)
+    arr_wide = np.full((df.index.size, len(idx_names)), np.nan, dtype=object)
+    arr_flat = arr_rows * len(idx_names) + arr_codes
+    if (arr_flat[1:] <= arr_flat[:-1]).any():
+        arr_last = arr_flat.size - 1 - np.unique(arr_flat[::-1], return_index=True)[1]
+        arr_flat, arr_vals = arr_flat[arr_last], arr_vals[arr_last]
+    arr_wide.reshape(-1)[arr_flat] = arr_vals
+
+    dfWide = pd.DataFrame(arr_wide, columns=list(idx_names), dtype=object)
+    if df[sSplitCol].dtype != object: dfWide = dfWide.astype(df[sSplitCol].dtype)
+    return pd.concat([df[lst_keys].reset_index(drop=True), dfWide], axis=1)
+
+def SplitNameValuePairs(ser, sDelim1, sDelim2):
+    """
+    Row position, name code, names (in order of first appearance) and value of
+    every name<sDelim2>value element of a delimited string Series (split at the
+    first sDelim2; elements without it, null and non-string rows are skipped).
+    Delimiters are literal strings
+
+    With pyarrow, the whole column is split by Arrow compute kernels and names
+    are dictionary-encoded without creating a Python string per name. Otherwise
+    well-formed cells (every element has exactly one single-character sDelim2)
+    are joined and split once, and only other cells are partitioned per element
+
+    JDL 10/17/26
+    """
+    arr_pos = np.flatnonzero(StringCellsFilter(ser))
+    if IsPyArrow: return SplitNameValuePairsArrow(ser.iloc[arr_pos], arr_pos, sDelim1, sDelim2)
+    arr_rows, arr_names, arr_vals = SplitNameValuePairsJoined(ser.iloc[arr_pos], arr_pos, 
+                                                              sDelim1, sDelim2)
+    arr_codes, idx_names = pd.factorize(arr_names)
+    return arr_rows, arr_codes, idx_names, arr_vals
+
+def SplitNameValuePairsArrow(ser_str, arr_pos, sDelim1, sDelim2):
+    """
+    Arrow version of SplitNameValuePairs for string cells ser_str at row positions arr_pos
+    """
+    arr_str = pa.array(ser_str.astype(object), type=pa.large_string(), from_pandas=True)
+    arr_elems = pc.split_pattern(arr_str, sDelim1)
+    arr_rows = np.repeat(arr_pos, pc.list_value_length(arr_elems).to_numpy(zero_copy_only=False))
+    arr_pairs = pc.split_pattern(pc.list_flatten(arr_elems), sDelim2, max_splits=1)
+    fil_pair = pc.equal(pc.list_value_length(arr_pairs), 2)
+    if not pc.all(fil_pair).as_py():
+        arr_pairs = arr_pairs.filter(fil_pair)
+        arr_rows = arr_rows[fil_pair.to_numpy(zero_copy_only=False)]
+    arr_names = pc.dictionary_encode(pc.list_element(arr_pairs, 0))
+    return (arr_rows, arr_names.indices.to_numpy(zero_copy_only=False).astype(np.int64),
+            pd.Index(arr_names.dictionary.to_pylist(), dtype=object),
+            pc.list_element(arr_pairs, 1).to_numpy(zero_copy_only=False))
+
+def SplitNameValuePairsJoined(ser_str, arr_pos, sDelim1, sDelim2):
+    """
+    Pure pandas/Python version of SplitNameValuePairs (row positions, names, values)
+    for string cells ser_str at row positions arr_pos
+    """
+    fil_simple = np.zeros(ser_str.size, dtype=bool)
+    if len(sDelim1) == 1 and len(sDelim2) == 1 and sDelim1 != sDelim2 and ser_str.size > 0:
+        sElem = '[^' + re.escape(sDelim1 + sDelim2) + ']*'
+        sPair = sElem + re.escape(sDelim2) + sElem
+        fil_simple = ser_str.astype(object).str.fullmatch(sPair + '(?:' + re.escape(sDelim1) + 
+                                                          sPair + ')*').to_numpy(dtype=bool)
+
+    #Well-formed cells: one join + replace + split over the column (names/values alternate)
+    ser_simple = ser_str[fil_simple].astype(object)
+    arr_counts = ser_simple.str.count(re.escape(sDelim2)).to_numpy(dtype=np.int64)
+    arr_toks = np.zeros(0, dtype=object)
+    if ser_simple.size > 0:
+        arr_toks = np.array(ser_simple.str.cat(sep=sDelim1).replace(sDelim2, sDelim1).split(sDelim1),
+                            dtype=object)
+    arr_rows, arr_names, arr_vals = np.repeat(arr_pos[fil_simple], arr_counts), arr_toks[0::2], arr_toks[1::2]
+    if fil_simple.all(): return arr_rows, arr_names, arr_vals
+
+    #Malformed cells: partition each element at its first sDelim2
+    lst_rows, lst_names, lst_vals = [], [], []
+    for i, s in zip(arr_pos[~fil_simple], ser_str[~fil_simple]):
+        for sElem in s.split(sDelim1):
+            name, sep, val = sElem.partition(sDelim2)
+            if len(sep) > 0:
+                lst_rows.append(i)
+                lst_names.append(name)
+                lst_vals.append(val)
+    arr_order = np.argsort(np.concatenate([arr_rows, np.array(lst_rows, dtype=np.int64)]), kind='stable')
+    return tuple(np.concatenate([arr, np.array(lst, dtype=arr.dtype)])[arr_order] for arr, lst in 
+                 [(arr_rows, lst_rows), (arr_names, lst_names), (arr_vals, lst_vals)])
 
 def JoinNonSplitStackCols(df_reshaped, df, lst_keys, splitcol):
     """
@@ -268,27 +375,49 @@ def JoinNonSplitStackCols(df_reshaped, df, lst_keys, splitcol):
     dftemp = dftemp.drop(splitcol, axis=1)
     
     #merge into df_reshaped
-    df_out = df_reshaped
+    dfout = df_reshaped
     if len(dftemp.columns) > 0:
         dfout = df_reshaped.merge(dftemp, how='left', left_on=lst_keys, right_index=True)
     return dfout
 
-def SplitAndSubsplitDelimitedColumn(df, lstKeys, splitcol, lstDelim, sIDPrefix):
+def SplitAndSubsplitDelimitedColumn(df, lstKeys, splitcol, lstDelim, sIDPrefix, iChunkRows=100_000):
     """
     Compound parsing of delimited Pandas column
     Split a specified column on multiple delimiters and stack elements in single rows with ID columns
 
-    JDL 8/10/21
+    Concatenates IterSplitAndSubsplitDelimitedColumn blocks (see there for memory)
+    JDL 8/10/21; chunked 10/17/26
     """
-    dfShaped = df.copy()
-    i = 1
-    for delim in lstDelim:
-        sID = sIDPrefix + str(i)
-        dfShaped = SplitAndStack(dfShaped, lstKeys, splitcol, delim, sID)
-        lstKeys.append(sID)
-        i += 1
+    dfShaped = pd.concat(IterSplitAndSubsplitDelimitedColumn(df, lstKeys, splitcol, lstDelim,
+                                                sIDPrefix, iChunkRows), ignore_index=True)
+    lstKeys.extend([sIDPrefix + str(i) for i in range(1, len(lstDelim) + 1)])
     return dfShaped, lstKeys
 
+def IterSplitAndSubsplitDelimitedColumn(df, lstKeys, splitcol, lstDelim, sIDPrefix, iChunkRows=100_000):
+    """
+    Generator of SplitAndSubsplitDelimitedColumn output for iChunkRows input rows at a time
+    (Blocks are in full output row order; lstKeys is not modified; empty df yields
+    one empty block)
+
+    Peak memory is about one block's long output (keys + IDs + one string per
+    element) plus its split lists, so it scales with iChunkRows x elements per
+    row rather than with input size. The former str.split(expand=True) version
+    also built rows x longest-row wide frames (per delimiter) for the whole input
+    """
+    for i0 in range(0, max(df.index.size, 1), iChunkRows):
+        yield SplitAndSubsplitBlock(df.iloc[i0:i0 + iChunkRows], lstKeys, splitcol, lstDelim, sIDPrefix)
+
+def SplitAndSubsplitBlock(df, lstKeys, splitcol, lstDelim, sIDPrefix):
+    """
+    Split and stack one block of rows on each delimiter in turn
+    """
+    dfShaped, lstKeysBlock = df, list(lstKeys)
+    for i, delim in enumerate(lstDelim, start=1):
+        sID = sIDPrefix + str(i)
+        dfShaped = SplitAndStack(dfShaped, lstKeysBlock, splitcol, delim, sID)
+        lstKeysBlock.append(sID)
+    return dfShaped
+
 def PivotOnLastID(dfShaped, lstKeys, splitcol):
     """
     Compound parsing of delimited Pandas column
@@ -302,7 +431,6 @@ def PivotOnLastID(dfShaped, lstKeys, splitcol):
     
     #Name the columns
     dfShaped.columns.name = None
-    dfShaped.to_csv('temp2.csv')
     dfShaped.columns = ['param', 'value']
 
     #Drop the Param/Value ID from the index (param name and other keys fully identifies rows)
@@ -327,6 +455,79 @@ def UnstackLastSplit(dfShaped):
     dfShaped.columns.name=None
     return dfShaped
 
+class DelimitedColsPipeline():
+    """
+    Parse several delimited columns per row concurrently and join results once
+
+    lst_specs is a list of (column, list of delimiters) such as
+    [('settings', [';', '=']), ('faults', ['|', ';', '='])]. Each column is
+    parsed by ParseDelimitedCol (SplitAndSubsplitDelimitedColumn -> PivotOnLastID
+    -> UnstackLastSplit) in its own worker process, which is sent only the key
+    columns plus that column. Parsed frames (param names as columns, indexed by
+    lst_keys) are left-joined onto the non-split columns in one join, so rows
+    without parsed values keep NaN. IsPrefixCols=True names param columns <column>_<param> to avoid
+    collisions between columns. IDs from delimiters before the last two become
+    columns and repeat a row per ID, so at most one spec may have more than two
+    delimiters (two such specs would join as a per-key cartesian product of
+    unrelated IDs; parse them in separate pipelines). n_workers=1 runs in process
+    (no pool)
+
+    JDL 10/17/26
+    """
+    def __init__(self, lst_keys, lst_specs, n_workers=None, sIDPrefix='ID', IsPrefixCols=False):
+        lst_id_cols = [col for col, lstDelim in lst_specs if len(lstDelim) > 2]
+        if len(lst_id_cols) > 1:
+            raise ValueError('Only one spec may have more than two delimiters (leading IDs); got ' +
+                             str(lst_id_cols))
+        self.lst_keys = lst_keys
+        self.lst_specs = lst_specs
+        self.n_workers = n_workers      #None uses one process per spec (up to cpu count)
+        self.sIDPrefix = sIDPrefix
+        self.IsPrefixCols = IsPrefixCols
+
+    def Run(self, df):
+        """
+        Parsed and joined DataFrame: keys, non-split columns, then params by spec
+        """
+        lst_args = [[df[self.lst_keys + [col]] for col, _ in self.lst_specs],
+                    [self.lst_keys] * len(self.lst_specs),
+                    [col for col, _ in self.lst_specs],
+                    [lstDelim for _, lstDelim in self.lst_specs],
+                    [self.sIDPrefix] * len(self.lst_specs)]
+        if self.n_workers == 1 or len(self.lst_specs) < 2:
+            lst_parsed = list(map(ParseDelimitedCol, *lst_args))
+        else:
+            n_workers = self.n_workers
+            if n_workers is None: n_workers = min(len(self.lst_specs), os.cpu_count())
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                lst_parsed = list(executor.map(ParseDelimitedCol, *lst_args))
+        return self.JoinParsed(df, lst_parsed)
+
+    def JoinParsed(self, df, lst_parsed):
+        """
+        Left-join parsed frames onto df's non-split columns by lst_keys in one join
+        """
+        if self.IsPrefixCols:
+            lst_parsed = [dfParsed.add_prefix(col + '_') 
+                          for dfParsed, (col, _) in zip(lst_parsed, self.lst_specs)]
+
+        #ID levels beyond lst_keys become columns (rows repeat per ID)
+        lst_parsed = [dfParsed.reset_index(level=dfParsed.index.names[len(self.lst_keys):])
+                      if dfParsed.index.nlevels > len(self.lst_keys) else dfParsed
+                      for dfParsed in lst_parsed]
+        dfBase = df.drop(columns=[col for col, _ in self.lst_specs]).set_index(self.lst_keys)
+        return dfBase.join(lst_parsed, how='left').reset_index()
+
+def ParseDelimitedCol(df, lst_keys, col, lstDelim, sIDPrefix='ID'):
+    """
+    Split/pivot/unstack one delimited column (pipeline worker; see DelimitedColsPipeline)
+    Returns params as columns indexed by lst_keys (plus IDs from any leading delimiters)
+    """
+    dfShaped, lstKeys = SplitAndSubsplitDelimitedColumn(df, list(lst_keys), col, lstDelim, 
+                                                        sIDPrefix + '_' + col + '_')
+    dfShaped = PivotOnLastID(dfShaped, lstKeys, col)
+    return UnstackLastSplit(dfShaped)
+
 def AddRowIncidence(df, lst_keys):
     """
     Add a column with incidence of specified key column values
@@ -354,15 +555,85 @@ def DeleteNestedVariableBrackets(df, col):
         df[col] = df[col].astype(str).str.replace(sReplace, sWith, regex=False)
     return df
 
-def EvalCol(df, col):
+def EvalCol(df, col, parser=None):
     """
-    eval(x) converts string values to dict or list based on [] or {} delimiters/formatting
+    Convert string values to dict or list based on [] or {} delimiters/formatting
+    (Safe parse via LiteralColParser. Default parser's cache lives for this call
+    only; pass LITERAL_PARSER or another parser to reuse a cache across calls)
 
-    JDL 8/25/21
+    JDL 8/25/21; safe, cached parse 10/17/26
     """
-    df[col]=df[col].apply(lambda x:util.EvalAll(x))
+    if parser is None: parser = LiteralColParser()
+    df[col] = parser.ParseCol(df[col])
     return df
 
+class LiteralColParser():
+    """
+    Column-at-a-time safe literal parser for nested list/dict cells (e.g. after
+    DeleteNestedVariableBrackets)
+
+    Each distinct string in a column is parsed once. New [ or { strings are
+    decoded together in one json.loads call; if any of them is not valid JSON,
+    they fall back to util.EvalAll per cell (json.loads, then ast.literal_eval;
+    unparseable strings are kept as is). Parsed values are cached for the
+    parser's lifetime (cleared when iMaxCache entries is reached) and gathered
+    back to rows by factorize codes. Non-string cells pass through unchanged.
+    Rows with identical strings share one parsed object, and a parser reused
+    across calls returns the same objects again, so treat results as read-only
+
+    JDL 10/17/26
+    """
+    def __init__(self, iMaxCache=1_000_000):
+        self.iMaxCache = iMaxCache
+        self.dict_cache = {}            #String: parsed value
+        self.dict_stats = {'cells':0, 'unique':0, 'parsed':0}
+
+    def ParseCol(self, ser):
+        """
+        Parsed values of a Series (same index and name; object dtype)
+        """
+        arr = ser.to_numpy(dtype=object)
+        fil_str = np.fromiter((isinstance(val, str) for val in arr), dtype=bool, count=arr.size)
+        arr_codes, arr_unique = pd.factorize(arr[fil_str])
+        self.ParseBatchJSON([s for s in arr_unique if s not in self.dict_cache and s[:1] in ('[', '{')])
+        arr_parsed = np.empty(arr_unique.size, dtype=object)
+        for i, s in enumerate(arr_unique):
+            arr_parsed[i] = self.Parse(s)
+
+        arr_out = arr.copy()
+        arr_out[fil_str] = arr_parsed[arr_codes]
+        self.dict_stats['cells'] += int(fil_str.sum())
+        self.dict_stats['unique'] += arr_unique.size
+        return pd.Series(arr_out, index=ser.index, name=ser.name, dtype=object)
+
+    def Parse(self, s):
+        """
+        Parsed value of one string (from cache if seen before)
+        """
+        if s in self.dict_cache: return self.dict_cache[s]
+        if len(self.dict_cache) >= self.iMaxCache: self.dict_cache = {}
+        self.dict_cache[s] = util.EvalAll(s)
+        self.dict_stats['parsed'] += 1
+        return self.dict_cache[s]
+
+    def ParseBatchJSON(self, lst_s):
+        """
+        Decode JSON strings in one json.loads call and cache them. Each string is
+        wrapped in its own [] so a malformed cell cannot merge with its neighbors
+        undetected; nothing is cached if the batch fails
+        """
+        if len(lst_s) < 1 or len(lst_s) > self.iMaxCache - len(self.dict_cache): return
+        try:
+            lst = json.loads('[[' + '],['.join(lst_s) + ']]', parse_constant=util.RejectJSONConstant)
+        except ValueError:
+            return
+        if len(lst) != len(lst_s) or any(len(item) != 1 for item in lst): return
+        self.dict_cache.update(zip(lst_s, (item[0] for item in lst)))
+        self.dict_stats['parsed'] += len(lst_s)
+
+#Opt-in shared parser (and cache) for EvalCol(df, col, LITERAL_PARSER) across calls
+LITERAL_PARSER = LiteralColParser()
+
 def RenameDfFromKeepColDict(dict_names, df):
     """
     Subset DataFrame based on dictionary of keep names (keys) and new names (values)
@@ -416,34 +687,72 @@ def StackAndReindex(df_in, lstIndex, sNameStacked='Stacked Col', sNameCtIdx='Cou
 
 def RecodeFlagColToBoolean(df, sCol):
     """
-    Map  data 1/blank flag column to boolean type
-    JDL 10/26/21 
+    Map  data 1/blank flag column(s) to boolean type
+    (sCol is a column name or list of names; missing columns are skipped)
+    Vectorized equivalent of map(lambda x: not util.IsNullVal(x))
+    JDL 10/26/21; vectorized 10/17/26
     """
-    #Map to True if original value is non-null
-    if sCol not in df.columns: return df
-    df[sCol] = df[sCol].map(lambda x: False if util.IsNullVal(x) else True)
+    #True if original value is non-null
+    for col in FlagCols(df, sCol):
+        df[col] = ~IsNullValArray(FlagColValues(df[col]))
     return df
 
 def RecodeFlagColToOnes(df, sCol):
     """
-    Map Boolean flag column to 1/blank (e.g. for writing efficiently in Excel)
-    JDL 10/26/21
+    Map Boolean flag column(s) to 1/blank (e.g. for writing efficiently in Excel)
+    Vectorized equivalent of map(lambda x: 1 if x else np.nan) (int64 if no blanks)
+    JDL 10/26/21; vectorized 10/17/26
     """
     #Map True to 1; False to blank
-    if sCol not in df.columns: return df
-    df[sCol] = df[sCol].map(lambda x: 1 if x else np.nan)
+    for col in FlagCols(df, sCol):
+        arr_truthy = FlagColValues(df[col]).astype(bool)
+        if arr_truthy.all():
+            df[col] = np.ones(arr_truthy.size, dtype=np.int64)
+        else:
+            df[col] = np.where(arr_truthy, 1., np.nan)
     return df
 
 def RecodeFlagColToOnesZeroes(df, sCol):
     """
-    Map Boolean flag column to 1/0 (e.g. for selection in graphics software)
-    JDL 4/26/21
+    Map Boolean flag column(s) to 1/0 (e.g. for selection in graphics software)
+    Vectorized equivalent of map(lambda x: 1 if x else 0)
+    JDL 4/26/21; vectorized 10/17/26
     """
-    #Map True to 1; False to blank
-    if sCol not in df.columns: return df
-    df[sCol] = df[sCol].map(lambda x: 1 if x else 0)
+    #Map True to 1; False to 0
+    for col in FlagCols(df, sCol):
+        df[col] = FlagColValues(df[col]).astype(bool).astype(np.int64)
     return df
 
+def FlagCols(df, sCol):
+    """
+    Non-empty columns of df named by sCol (a column name or list of names)
+    (Empty columns are left as is, matching Series.map on no rows)
+    """
+    lst_cols = [sCol] if isinstance(sCol, str) else list(sCol)
+    return [col for col in lst_cols if col in df.columns and df[col].size > 0]
+
+def FlagColValues(ser):
+    """
+    NumPy values of a flag column as Series.map passes them to a function: numeric
+    arrays as is; other dtypes as objects with missing values as np.nan (datetimes
+    keep NaT, object columns keep None and string columns their own NA value)
+    """
+    if ser.dtype.kind in 'fiub': return ser.to_numpy()
+    if ser.dtype == object or ser.dtype.kind in 'mM' or isinstance(ser.dtype, pd.StringDtype):
+        return ser.to_numpy(dtype=object)
+    return ser.to_numpy(dtype=object, na_value=np.nan)
+
+def IsNullValArray(arr):
+    """
+    Vectorized util.IsNullVal: True for float NaN only (not None, NaT or pd.NA)
+    Object arrays check element type only where pd.isna is True
+    """
+    if arr.dtype.kind == 'f': return np.isnan(arr)
+    if arr.dtype != object: return np.zeros(arr.size, dtype=bool)
+    arr_null = pd.isna(arr)
+    idx = np.flatnonzero(arr_null)
+    arr_null[idx] = [isinstance(val, float) for val in arr[idx]]
+    return arr_null
 
 def BuildLstIntersect(df, lst_master):
     """
@@ -28,6 +28,20 @@ class ScriptsFiles_New():
         self.sPF_data = dirpathutil.MakePath(self.spathdata + 'data.csv')
         self.sF_data = 'data.csv'
 
+        #input file schema - compact dtypes for raw data (see align_pipeline.ReadDataCompact)
+        self.dict_dtypes_data = {'device_id':'category', 'refill_percent':'UInt8', 
+                                 'intensity':'float32'}
+        self.lst_datecols_data = ['timestamp']
+
         #output file - align_intensity transformed data
         self.sPF_data_out = dirpathutil.MakePath(self.spathdata + 'data_out.csv')
-        self.sF_data_out = 'data_out.csv'
\ No newline at end of file
+        self.sF_data_out = 'data_out.csv'
+
+        #batch output folder - align_batch.BatchAlign outputs and combined summary
+        self.spathbatchout = dirpathutil.MakePath(self.spathdata + 'aligned/')
+
+        #cache folder - columnar cache of transformed data (see dfcache.py)
+        self.spathcache = dirpathutil.MakePath(self.spathdata + 'cache/')
+
+        #memmap store folder - one .npy per column (see align_memmap.py)
+        self.spathnpy = dirpathutil.MakePath(self.spathdata + 'npy/')
\ No newline at end of file
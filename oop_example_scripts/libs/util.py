@@ -10,6 +10,7 @@ import datetime as dt
 import random 
 import string
 import re
+import ast, json
 from datetime import datetime, date, timedelta
 
 class BlockIteration():
@@ -136,13 +137,31 @@ def PrintDuration(tstart):
 
 def EvalAll(st):
     """
-    Use Python eval() to attempt to evaluate any object
-    JDL 8/25/21 (Call DemoEvalAll() to test/demo)
+    Safely convert a string to the list, dict, number or other literal it represents
+    Tries json.loads (fast C decoder) then ast.literal_eval (Python literals such
+    as single-quoted dicts). Returns st unchanged if neither parses or st is not
+    a string. Unlike the former eval() version, never executes code; JSON
+    true/false/null decode to True/False/None. NaN/Infinity are not literals,
+    so 'NaN' or '[NaN]' stay strings as before
+    JDL 8/25/21; safe parse 10/17/26 (Call DemoEvalAll() to test/demo)
     """
+    if not isinstance(st, str): return st
     try:
-        return eval(str(st))
-    except:
+        return json.loads(st, parse_constant=RejectJSONConstant)
+    except ValueError:
+        pass
+    try:
+        return ast.literal_eval(st.strip())
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
         return st
+
+def RejectJSONConstant(s):
+    """
+    json.loads parse_constant hook: reject NaN, Infinity and -Infinity (not
+    Python literals, so eval/ast.literal_eval never parsed them)
+    """
+    raise ValueError('JSON constant ' + s + ' is not a literal')
+
 def DemoEvalAll():
     """ Demo the EvalAll() function """
     for w in ['[1,2]', 1, 'xxx', {'a':1, 'b':2}]:
@@ -0,0 +1,76 @@
+#Version 10/17/26
+#python -m pytest test_align_batch.py -v -s
+
+#Set home (projname_scripts) Path and import needed libraries
+import pandas as pd
+import numpy as np
+import pytest
+import sys, os
+from pathlib import Path
+sPathHome = str(Path(__file__).parent)
+sPathHome = sPathHome[0:sPathHome.rfind(os.sep)]
+if not sPathHome in sys.path: sys.path.append(sPathHome)
+sPathLibs = sPathHome + os.sep + 'libs'
+if not sPathLibs in sys.path: sys.path.append(sPathLibs)
+import scriptsfiles
+import align_batch
+
+@pytest.fixture
+def files(tmp_path):
+    """
+    Files class pointed at a temp data folder holding three site/day files
+    """
+    files = scriptsfiles.ScriptsFiles_New(IsTest=True)
+    df = pd.read_csv(files.sPF_data)
+    files.spathdata = str(tmp_path) + os.sep
+    files.spathbatchout = files.spathdata + 'aligned' + os.sep
+    df.to_csv(files.spathdata + 'site1_20220608.csv', index=False)
+    df.to_csv(files.spathdata + 'site2_20220608.csv', index=False)
+    df.iloc[:15].to_csv(files.spathdata + 'site3_20220608.csv', index=False)
+    return files
+
+def test_files_spathbatchout():
+    files = scriptsfiles.ScriptsFiles_New(IsTest=True)
+    assert files.spathbatchout == files.spathdata + 'aligned' + os.sep
+
+def test_Run(files):
+    """
+    Align discovered files, write outputs + combined summary, report throughput
+    """
+    with align_batch.BatchAlign(files, sGlob='site*.csv', n_workers=2) as batch:
+        dict_tp = batch.Run()
+        executor = batch.executor
+        batch.Run()
+        assert batch.executor is executor
+
+    assert batch._executor is None
+    assert dict_tp['files'] == 3
+    assert dict_tp['rows'] == 95
+    assert dict_tp['rows_per_sec'] > 0 and dict_tp['files_per_sec'] > 0
+    assert list(batch.dfFileReport['rows']) == [40, 40, 15]
+
+    lst_expected = [6,7,13,14,21,27,28,29,31,36,38,39]
+    for sPF, lst_idx in zip(batch.dfFileReport['output'], 2 * [lst_expected] + [lst_expected[:4]]):
+        df = pd.read_csv(sPF)
+        assert list(df['intensity_aligned'].dropna().index) == lst_idx
+    assert list(batch.ser_summ_intensity) == [7.5, 5.25, 9.5]
+    ser = pd.read_csv(files.spathbatchout + 'summary.csv', index_col=0).iloc[:, 0]
+    assert list(ser) == [7.5, 5.25, 9.5]
+
+def test_DiscoverFiles(files):
+    """
+    Default glob skips data_out.csv and earlier outputs written into spathdata
+    """
+    files.sPF_data_out = files.spathdata + files.sF_data_out
+    pd.read_csv(files.spathdata + 'site3_20220608.csv').to_csv(files.sPF_data_out, index=False)
+    files.spathbatchout = files.spathdata
+    batch = align_batch.BatchAlign(files, n_workers=1)
+    lst_expected = [files.spathdata + 'site' + s + '_20220608.csv' for s in '123']
+    assert batch.DiscoverFiles() == lst_expected
+
+    with batch:
+        dict_tp = batch.Run()
+        assert batch.DiscoverFiles() == lst_expected
+        batch.Run()
+    assert dict_tp['files'] == 3
+    assert list(batch.ser_summ_intensity) == [7.5, 5.25, 9.5]
@@ -52,6 +52,328 @@ def lst_test_devices():
 #print(align._dfC)
 #def test_dfC_property(dfC_input, lst_test_devices):
 
+def test_property_cache(align, lst_test_devices):
+    """
+    Repeated property access reuses cached transform until Invalidate()
+    """
+    lst_events = []
+    align.CacheHook = lambda sStage, IsHit: lst_events.append((sStage, IsHit))
+
+    df = align.dfC
+    ser = align.ser_summ_intensity
+    CheckIntensitySummary(ser, lst_test_devices)
+    assert align.dfC is df
+    assert lst_events == [('transform', False), ('transform', True), 
+                          ('summary', False), ('transform', True)]
+    assert align.dict_cache_stats == {'hits':2, 'misses':2}
+
+    #Changing input data requires explicit invalidation
+    align._dfC.loc[6, 'refill_percent'] = np.nan
+    align.Invalidate()
+    assert align.ser_summ_intensity['DSN_001'] == 7.33
+    assert align.dict_cache_stats == {'hits':2, 'misses':4}
+
+def test_numpy_engine(dfC_input, lst_test_devices):
+    """
+    Single-pass NumPy engine matches the step-by-step pandas procedure
+    """
+    df_expected = align_intensity.SummIntensityByDecr(dfC_input.copy()).dfC
+    align_np = align_intensity.SummIntensityByDecr(dfC_input, sEngine='numpy')
+    pd.testing.assert_frame_equal(align_np.dfC, df_expected)
+    CheckIntensitySummary(align_np.ser_summ_intensity, lst_test_devices)
+
+def test_numba_engine(dfC_input, lst_test_devices):
+    """
+    Compiled engine (NumPy fallback if numba is not installed) matches pandas procedure
+    """
+    df_expected = align_intensity.SummIntensityByDecr(dfC_input.copy()).dfC
+    align_nb = align_intensity.SummIntensityByDecr(dfC_input, sEngine='numba')
+    pd.testing.assert_frame_equal(align_nb.dfC, df_expected)
+    CheckIntensitySummary(align_nb.ser_summ_intensity, lst_test_devices)
+
+def test_unknown_engine(dfC_input):
+    """
+    Misspelled engine name raises instead of silently running the pandas steps
+    """
+    with pytest.raises(ValueError, match='numbaa'):
+        align_intensity.SummIntensityByDecr(dfC_input, sEngine='numbaa')
+
+def test_AlignIntensityLoop(align):
+    """
+    Uncompiled loop kernel matches the vectorized AlignIntensityArrays
+    """
+    align.BuildSegmentIndex()
+    args = (align._arr_dev_change, align.fil_null_refperc.to_numpy(),
+            align_intensity.FloatArray(align._dfC['intensity']))
+    np.testing.assert_array_equal(align_intensity.AlignIntensityLoop(*args),
+                                  align_intensity.AlignIntensityArrays(*args))
+
+@pytest.mark.parametrize('sEngine', ['pandas', 'numpy', 'numba'])
+def test_real_999_intensity(dfC_input, lst_test_devices, sEngine):
+    """
+    A reported intensity of 999 is real data (not a fill-down marker) in both engines
+    """
+    dfC_input.loc[5, 'intensity'] = 999.
+    align = align_intensity.SummIntensityByDecr(dfC_input, sEngine=sEngine)
+    assert list(align.dfC.loc[[6, 7, 13, 14], 'intensity_aligned']) == [999., 999., 7., 7.]
+    assert list(align.ser_summ_intensity) == [503.0, 5.25, 9.5]
+
+@pytest.mark.parametrize('lst_cuts', [[20], [7, 16, 31], [30, 35]])
+def test_Append(dfC_input, lst_test_devices, lst_cuts):
+    """
+    Appending row blocks matches a full-history run
+    """
+    df_expected = align_intensity.SummIntensityByDecr(dfC_input.copy()).dfC
+    lst_bounds = lst_cuts + [dfC_input.index.size]
+    align = align_intensity.SummIntensityByDecr(dfC_input.iloc[:lst_cuts[0]].copy())
+    for i, j in zip(lst_bounds[:-1], lst_bounds[1:]):
+        align.Append(dfC_input.iloc[i:j].copy())
+        assert align._dfDevState is not None
+
+    CheckIntensitySummary(align.ser_summ_intensity, lst_test_devices)
+    pd.testing.assert_frame_equal(align.dfC, df_expected)
+
+@pytest.mark.parametrize('lst_blocks', [
+    [list(range(7)) + list(range(15, 30)), list(range(7, 15)) + list(range(30, 40))],
+    [list(range(5)) + list(range(15, 20)) + list(range(30, 35)),
+     list(range(5, 10)) + list(range(20, 25)) + list(range(35, 40)),
+     list(range(10, 15)) + list(range(25, 30))]])
+def test_Append_interleaved(dfC_input, lst_test_devices, lst_blocks):
+    """
+    Blocks with interleaved devices join each device's run: results match a full
+    run and do not change after Invalidate()
+    """
+    align_full = align_intensity.SummIntensityByDecr(dfC_input.copy())
+    align = align_intensity.SummIntensityByDecr(dfC_input.loc[lst_blocks[0]].copy())
+    for lst_rows in lst_blocks[1:]:
+        align.Append(dfC_input.loc[lst_rows].copy())
+
+    for IsInvalidate in [False, True]:
+        if IsInvalidate: align.Invalidate()
+        CheckIntensitySummary(align.ser_summ_intensity, lst_test_devices)
+        pd.testing.assert_frame_equal(align.dfC, align_full.dfC)
+        pd.testing.assert_series_equal(align.ser_summ_intensity_weighted,
+                                       align_full.ser_summ_intensity_weighted)
+        pd.testing.assert_frame_equal(align.WindowSummary('1h'), align_full.WindowSummary('1h'))
+
+@pytest.mark.parametrize('iCut', [20, 35])
+def test_Append_categorical(files, lst_test_devices, iCut):
+    """
+    Appending compact-schema rows (categorical device_id with unused categories in
+    the new block) applies each device's own carry
+    """
+    dfC_compact = pd.read_csv(files.sPF_data, dtype=files.dict_dtypes_data,
+                              parse_dates=files.lst_datecols_data)
+    df_expected = align_intensity.SummIntensityByDecr(dfC_compact.copy()).dfC
+    align = align_intensity.SummIntensityByDecr(dfC_compact.iloc[:iCut].copy())
+    align.Append(dfC_compact.iloc[iCut:].copy())
+    CheckIntensitySummary(align.ser_summ_intensity, lst_test_devices)
+    pd.testing.assert_frame_equal(align.dfC, df_expected)
+
+@pytest.mark.parametrize('iLateRow', [12, 21])
+def test_Append_late_rows(dfC_input, lst_test_devices, iLateRow):
+    """
+    Late row triggers its device's recompute and is moved to its timestamp position;
+    result matches a full run, before and after Invalidate()
+    """
+    df_expected = align_intensity.SummIntensityByDecr(dfC_input.copy()).dfC
+    align = align_intensity.SummIntensityByDecr(dfC_input.drop(index=iLateRow))
+    align.ser_summ_intensity
+    align.Append(dfC_input.loc[[iLateRow]].copy())
+    CheckIntensitySummary(align.ser_summ_intensity, lst_test_devices)
+    pd.testing.assert_frame_equal(align.dfC, df_expected)
+
+    align.Invalidate()
+    CheckIntensitySummary(align.ser_summ_intensity, lst_test_devices)
+    pd.testing.assert_frame_equal(align.dfC, df_expected)
+
+@pytest.mark.parametrize('sEngine', ['pandas', 'numpy'])
+def test_copy_free_mode(dfC_input, cols_input, lst_test_devices, sEngine):
+    """
+    Copy-free mode leaves caller's frame untouched and shares its column buffers
+    """
+    df_before = dfC_input.copy()
+    align = align_intensity.SummIntensityByDecr(dfC_input, sEngine=sEngine, IsCopyFree=True)
+    CheckIntensitySummary(align.ser_summ_intensity, lst_test_devices)
+    assert list(align.dfC.columns) == cols_input + ['intensity_aligned']
+    pd.testing.assert_frame_equal(dfC_input, df_before)
+    for col in ['refill_percent', 'intensity']:
+        assert np.shares_memory(align.dfC[col].to_numpy(), dfC_input[col].to_numpy())
+
+    #Invalidate() picks up changes to the caller's frame
+    dfC_input.loc[6, 'refill_percent'] = np.nan
+    align.Invalidate()
+    assert align.ser_summ_intensity['DSN_001'] == 7.33
+    assert 'intensity_aligned' not in dfC_input.columns
+
+def test_ProfileReport(dfC_input, lst_test_devices):
+    """
+    Opt-in profiling records each step and calls callbacks
+    """
+    align = align_intensity.SummIntensityByDecr(dfC_input, IsProfile=True)
+    lst_steps = []
+    align.lst_profile_callbacks.append(lambda dict_step: lst_steps.append(dict_step['step']))
+    CheckIntensitySummary(align.ser_summ_intensity, lst_test_devices)
+
+    df = align.ProfileReport()
+    assert list(df.columns) == ['step', 'secs', 'rows', 'peak_mem_delta']
+    assert list(df['step']) == lst_steps
+    assert lst_steps == ['AddIntensityAlignedCol', 'UpdateFilters', 'FillDownDecrIntensity',
+                         'UpdateFilters', 'ClearUnneededValues',
+                         'SummarizeIntensityByDevice']
+    assert (df['rows'] == 40).all()
+    assert (df['secs'] > 0).all()
+
+    #Disabled by default
+    align = align_intensity.SummIntensityByDecr(dfC_input)
+    align.dfC
+    assert align.ProfileReport().index.size == 0
+
+def test_SortAndValidate(dfC_input, lst_test_devices):
+    """
+    Grouped/ordered input skips the sort; shuffled input is sorted before aligning
+    """
+    df_expected = align_intensity.SummIntensityByDecr(dfC_input.copy()).dfC
+
+    #Already ordered (devices need only be grouped, not in device_id order)
+    dfC_grouped = pd.concat([dfC_input.iloc[30:], dfC_input.iloc[:30]])
+    align = align_intensity.SummIntensityByDecr(dfC_grouped.copy(), IsSortInput=True)
+    pd.testing.assert_frame_equal(align.dfC, df_expected.loc[dfC_grouped.index])
+    assert align.dict_sort_stats == {'IsSorted':True, 'rows_out_of_order':0}
+
+    #Shuffled rows and datetime timestamps
+    dfC_shuffled = dfC_input.sample(frac=1, random_state=0)
+    dfC_shuffled['timestamp'] = pd.to_datetime(dfC_shuffled['timestamp'])
+    align = align_intensity.SummIntensityByDecr(dfC_shuffled, sEngine='numpy', IsSortInput=True)
+    assert align.dfC.index.size == 40
+    assert not align.dict_sort_stats['IsSorted']
+    assert align.dict_sort_stats['rows_out_of_order'] > 30
+    assert align.dfC['device_id'].is_monotonic_increasing
+    np.testing.assert_array_equal(align.dfC.sort_index()['intensity_aligned'],
+                                  df_expected['intensity_aligned'])
+    CheckIntensitySummary(align.ser_summ_intensity, lst_test_devices)
+
+    #Invalidate() re-sorts from the caller's (mutated) frame, not the stale sorted copy
+    dfC_shuffled.loc[6, 'refill_percent'] = np.nan
+    align.Invalidate()
+    assert align.ser_summ_intensity['DSN_001'] == 7.33
+    assert align.dfC['device_id'].is_monotonic_increasing
+
+def test_SortAndValidate_no_sort_keys(dfC_input, monkeypatch):
+    """
+    Sorted input is validated by raw value comparison (sort keys built only to sort)
+    """
+    def NoSortKeys(ser): raise AssertionError('sort keys built for sorted input')
+    monkeypatch.setattr(align_intensity, 'SortKeyCodes', NoSortKeys)
+    for dtype in [object, 'str']:
+        align = align_intensity.SummIntensityByDecr(dfC_input.astype({'timestamp':dtype}),
+                                                    IsSortInput=True)
+        align.SortAndValidate()
+        assert align.dict_sort_stats['IsSorted']
+
+@pytest.mark.parametrize('IsNullTs', [False, True])
+def test_IsOrderedWithinRuns(IsNullTs):
+    """
+    Timestamps may only decrease at device changes; null timestamps sort first
+    """
+    ser = pd.Series(['2022-06-08 01:00', '2022-06-08 02:00', '2022-06-08 00:00', '2022-06-08 03:00'])
+    if IsNullTs: ser[2] = None
+    arr_dev_change = np.array([True, False, True, False])
+    for ser_ts in [ser, pd.to_datetime(ser)]:
+        assert align_intensity.IsOrderedWithinRuns(ser_ts, arr_dev_change)
+        assert not align_intensity.IsOrderedWithinRuns(ser_ts, np.array([True, False, False, False]))
+
+@pytest.mark.parametrize('IsShuffled', [False, True])
+def test_DeviceRows(dfC_input, lst_test_devices, IsShuffled):
+    """
+    Device index lookup returns the same rows as a device_id filter
+    (Sorted input indexes by slice; shuffled input by row positions)
+    """
+    if IsShuffled: dfC_input = dfC_input.sample(frac=1, random_state=0)
+    align = align_intensity.SummIntensityByDecr(dfC_input)
+    for dev in lst_test_devices:
+        df_expected = align.dfC[align.dfC['device_id'] == dev]
+        pd.testing.assert_frame_equal(align.DeviceRows(dev), df_expected)
+    assert isinstance(align._dict_dev_index['DSN_002'], slice) != IsShuffled
+    assert align.DeviceRows('DSN_999').index.size == 0
+
+    #Index rebuilds after input changes
+    align.Append(dfC_input.iloc[:2].assign(device_id='DSN_004'))
+    df_expected = dfC_input.iloc[:2].sort_values('timestamp', kind='stable')
+    assert list(align.DeviceRows('DSN_004').index) == list(df_expected.index)
+
+def test_DeviceSummary(align, lst_test_devices):
+    """
+    One-device summary agrees with the all-device summary
+    """
+    ser = align.DeviceSummary('DSN_001')
+    assert ser['rows'] == 15
+    assert ser['refill_rows'] == 5
+    assert ser['intensity_aligned'] == align.ser_summ_intensity['DSN_001'] == 7.5
+    assert ser['timestamp_first'] == '2022-06-08 02:42:14'
+    assert ser['timestamp_last'] == '2022-06-09 19:10:57'
+
+def test_ser_summ_intensity_weighted(align, lst_test_devices):
+    """
+    Consumption-weighted summary (DSN_003's first refill row has no decrement)
+    """
+    ser = align.ser_summ_intensity_weighted
+    assert list(ser.index) == lst_test_devices
+    assert list(ser) == [7.5, 5.25, 9.67]
+    CheckIntensitySummary(align.ser_summ_intensity, lst_test_devices)
+
+    #A refill (percent increase) gets no weight; the next decrement is large
+    align._dfC.loc[13, 'refill_percent'] = 50
+    align.Invalidate()
+    assert align.ser_summ_intensity_weighted['DSN_001'] == round((8 + 8 + 7 * 39) / 41, 2)
+
+def test_WindowSummary(align, lst_test_devices):
+    """
+    Tumbling daily and sliding 2-day device x window matrices
+    """
+    df = align.WindowSummary('1D')
+    assert list(df.index) == lst_test_devices
+    assert list(df.columns.strftime('%m/%d')) == ['06/08', '06/09']
+    assert df.fillna(-1).values.tolist() == [[8., 7.], [6., 5.], [-1., 9.5]]
+
+    #Sliding windows include every window overlapping the data
+    df = align.WindowSummary('1D', sWindow='2D')
+    assert list(df.columns.strftime('%m/%d')) == ['06/07', '06/08', '06/09']
+    assert df.fillna(-1).values.tolist() == [[8., 7.5, 7.], [6., 5.25, 5.], [-1., 9.5, 9.5]]
+    pd.testing.assert_series_equal(df['2022-06-08'], align.ser_summ_intensity, check_names=False)
+
+    df = align.WindowSummary('10D', IsWeighted=True)
+    assert list(df.iloc[:, 0]) == list(align.ser_summ_intensity_weighted)
+
+    with pytest.raises(ValueError):
+        align.WindowSummary('1D', sWindow='36h')
+
+def test_WindowSummary_weekly(align, lst_test_devices):
+    """
+    Anchored weekly windows (Monday start for 'W') and weeks from an explicit origin
+    """
+    for sFreq, sOrigin in [('W', None), ('1W', None), ('W-SUN', None), ('7D', '2022-06-06')]:
+        df = align.WindowSummary(sFreq, sOrigin=sOrigin)
+        assert list(df.columns.strftime('%Y-%m-%d')) == ['2022-06-06']
+        pd.testing.assert_series_equal(df.iloc[:, 0], align.ser_summ_intensity, check_names=False)
+
+    #Weeks ending Wednesday start Thursday: 06/08 (Wed) and 06/09 (Thu) split
+    df = align.WindowSummary('W-WED')
+    assert list(df.columns.strftime('%Y-%m-%d')) == ['2022-06-02', '2022-06-09']
+    assert df.fillna(-1).values.tolist() == [[8., 7.], [6., 5.], [-1., 9.5]]
+
+    df = align.WindowSummary('W', sWindow='2W')
+    assert list(df.columns.strftime('%Y-%m-%d')) == ['2022-05-30', '2022-06-06']
+    with pytest.raises(ValueError):
+        align.WindowSummary('W', sWindow='10D')
+
+def test_DecrementWeights(align):
+    align.BuildSegmentIndex()
+    arr_refill = align_intensity.FloatArray(align._dfC['refill_percent'])
+    arr_w = align_intensity.DecrementWeights(align._arr_dev_change, arr_refill)
+    assert list(np.flatnonzero(arr_w)) == [6, 7, 13, 14, 21, 27, 28, 29, 36, 38, 39]
+    assert (arr_w[arr_w > 0] == 1).all()
+
 def test_ser_summ_intensity_property(dfC_input, lst_test_devices):
     ser = align_intensity.SummIntensityByDecr(dfC_input).ser_summ_intensity
     CheckIntensitySummary(ser, lst_test_devices)
@@ -95,48 +417,33 @@ def test_UpdateFilters_final(align):
     ProcedureThroughFillDown(align)
     align.UpdateFilters()
 
-    fil  = align.fil_999
+    #Rows before each device's first intensity stay blank (no carry from prior device)
+    fil  = align.fil_null_alignedintensity
     assert list(align._dfC[fil].index) == [0,1,2,3,4,15,16,17,18,19,20]
 
 def ProcedureThroughFillDown(align):
     align.AddIntensityAlignedCol()
     align.UpdateFilters()
-    align.PopulateDeviceChangeRows()
     align.FillDownDecrIntensity()
 
 
 def test_FillDownDecrIntensity(align, lst_test_devices):
     align.AddIntensityAlignedCol()
     align.UpdateFilters()
-    align.PopulateDeviceChangeRows()
     align.FillDownDecrIntensity()
 
     #Lists of expected values for each device section of data
-    #Device change row for DSN_003 already populated so no 999 there
-    lst_expected = [5 * [999.] + 7 * [8.] + 3 * [7.], 
-                    6 * [999.] + 4 * [6.] + 5 * [5.],
+    #Rows before a device's first intensity stay blank (DSN_003 starts with one)
+    lst_expected = [5 * [np.nan] + 7 * [8.] + 3 * [7.], 
+                    6 * [np.nan] + 4 * [6.] + 5 * [5.],
                     7 * [9.] + 3 * [10.]]
     col = 'intensity_aligned'
     for lstvals, dev in zip(lst_expected, lst_test_devices):
         fil = align._dfC['device_id'] == dev
-        assert list(align._dfC.loc[fil, col]) == lstvals
+        np.testing.assert_array_equal(align._dfC.loc[fil, col], lstvals)
     
     if IsOutputDemoFiles: OutputDfC(align._dfC, 'data_transformed4.xlsx')
 
-def test_PopulateDeviceChangeRows(align):
-    """
-    Add 999 values in device change rows as anchor for fill down
-    """
-    align.AddIntensityAlignedCol()
-    align.UpdateFilters()
-    align.PopulateDeviceChangeRows()
-
-    lst = list(align._dfC.loc[align.fil_dev_change, 'intensity_aligned'])
-    assert lst == [999, 999, 9]
-
-    if IsOutputDemoFiles: OutputDfC(align._dfC, 'data_transformed3.xlsx')
-
-
 def test_UpdateFilters_initial(align):
     """
     Check of filters initially --before transform to intensity_aligned
@@ -155,6 +462,22 @@ def test_UpdateFilters_initial(align):
     assert align._dfC[align.fil_dev_change].index.size == 3
     assert list(align._dfC[align.fil_dev_change].index) == [0, 15, 30]
 
+def test_BuildSegmentIndex(align):
+    """
+    Integer-coded devices and device run boundaries computed once per input
+    """
+    align.BuildSegmentIndex()
+    assert list(align._idx_devs) == ['DSN_001', 'DSN_002', 'DSN_003']
+    assert list(align._arr_seg_starts) == [0, 15, 30]
+    assert list(align._arr_dev_codes[[0, 14, 15, 29, 30, 39]]) == [0, 0, 1, 1, 2, 2]
+
+    #Filters are built on first access after UpdateFilters() 
+    align.UpdateFilters()
+    assert align._dict_fil == {}
+    fil = align.fil_dev_change
+    assert list(align._dict_fil.keys()) == ['dev_change']
+    assert align.fil_dev_change is fil
+
 def test_AddColumn(align, cols_input):
     """
     Copy intensity column to what will be the aligned column
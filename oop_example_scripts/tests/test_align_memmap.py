@@ -0,0 +1,89 @@
+#Version 10/17/26
+#python -m pytest test_align_memmap.py -v -s
+
+#Set home (projname_scripts) Path and import needed libraries
+import pandas as pd
+import numpy as np
+import pytest
+import sys, os
+import tracemalloc
+from pathlib import Path
+sPathHome = str(Path(__file__).parent)
+sPathHome = sPathHome[0:sPathHome.rfind(os.sep)]
+if not sPathHome in sys.path: sys.path.append(sPathHome)
+sPathLibs = sPathHome + os.sep + 'libs'
+if not sPathLibs in sys.path: sys.path.append(sPathLibs)
+import scriptsfiles
+import align_intensity
+import align_memmap
+import bench_align_intensity as bench
+
+@pytest.fixture
+def files():
+    """
+    Instance the project files class
+    """
+    return scriptsfiles.ScriptsFiles_New(IsTest=True)
+
+@pytest.fixture
+def sPath_npy(files, tmp_path):
+    """
+    Memmap store converted from tests/data.csv (small chunks to cross chunk edges)
+    """
+    sPath_npy = str(tmp_path) + os.sep + 'npy' + os.sep
+    assert align_memmap.CsvToNpy(files.sPF_data, sPath_npy, iChunkRows=7) == 40
+    return sPath_npy
+
+def test_CsvToNpy(files, sPath_npy):
+    """
+    One .npy per column plus device list; values round trip from the CSV
+    """
+    df = pd.read_csv(files.sPF_data)
+    assert list(np.load(sPath_npy + 'devices.npy')) == ['DSN_001', 'DSN_002', 'DSN_003']
+    arr_codes = np.load(sPath_npy + 'device_id.npy', mmap_mode='r')
+    assert arr_codes.dtype == np.int32
+    assert list(np.bincount(arr_codes)) == [15, 15, 10]
+    arr_ts = np.load(sPath_npy + 'timestamp.npy', mmap_mode='r')
+    assert (arr_ts == pd.to_datetime(df['timestamp']).to_numpy()).all()
+    for col in ['refill_percent', 'intensity']:
+        np.testing.assert_array_equal(np.load(sPath_npy + col + '.npy'), df[col])
+
+@pytest.mark.parametrize('iBlockRows', [1, 7, 15, 16, 100])
+def test_MemmapIntensityByDecr(files, sPath_npy, iBlockRows):
+    """
+    Block-walking alignment matches in-memory result for any block boundary placement
+    """
+    align_inmem = align_intensity.SummIntensityByDecr(pd.read_csv(files.sPF_data))
+    mm = align_memmap.MemmapIntensityByDecr(sPath_npy, iBlockRows)
+    np.testing.assert_array_equal(mm.arr_aligned, align_inmem.dfC['intensity_aligned'])
+    pd.testing.assert_series_equal(mm.ser_summ_intensity, align_inmem.ser_summ_intensity,
+                                   check_index_type=False)
+    assert os.path.isfile(sPath_npy + 'intensity_aligned.npy')
+
+    df = mm.ToDataFrame(13, 17)
+    assert list(df.columns) == list(align_inmem.dfC.columns)
+    assert list(df.index) == [13, 14, 15, 16]
+    assert list(df['device_id']) == ['DSN_001', 'DSN_001', 'DSN_002', 'DSN_002']
+
+def test_MemmapIntensityByDecr_memory(tmp_path):
+    """
+    Peak allocated memory depends on block size, not store size
+    """
+    lst_peak = []
+    for n_rows in [50_000, 400_000]:
+        sPath_npy = str(tmp_path) + os.sep + str(n_rows) + os.sep
+        sPF_csv = str(tmp_path) + os.sep + str(n_rows) + '.csv'
+        df = bench.SyntheticDeviceData(n_rows)
+        df.to_csv(sPF_csv, index=False)
+        align_memmap.CsvToNpy(sPF_csv, sPath_npy, iChunkRows=20_000)
+
+        mm = align_memmap.MemmapIntensityByDecr(sPath_npy, iBlockRows=10_000)
+        tracemalloc.start()
+        mm.AlignBlocks()
+        lst_peak.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+        ser_expected = align_intensity.SummIntensityByDecr(df, sEngine='numpy').ser_summ_intensity
+        pd.testing.assert_series_equal(mm.ser_summ_intensity, ser_expected,
+                                       check_index_type=False)
+    assert lst_peak[1] < 1.5 * lst_peak[0]
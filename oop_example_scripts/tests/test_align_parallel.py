@@ -0,0 +1,55 @@
+#Version 10/17/26
+#python -m pytest test_align_parallel.py -v -s
+
+#Set home (projname_scripts) Path and import needed libraries
+import pandas as pd
+import numpy as np
+import pytest
+import sys, os
+from pathlib import Path
+sPathHome = str(Path(__file__).parent)
+sPathHome = sPathHome[0:sPathHome.rfind(os.sep)]
+if not sPathHome in sys.path: sys.path.append(sPathHome)
+sPathLibs = sPathHome + os.sep + 'libs'
+if not sPathLibs in sys.path: sys.path.append(sPathLibs)
+import scriptsfiles
+import align_intensity
+import align_parallel
+
+@pytest.fixture
+def files():
+    """
+    Instance the project files class
+    """
+    return scriptsfiles.ScriptsFiles_New(IsTest=True)
+
+@pytest.fixture
+def dfC_input(files):
+    """
+    Open the input DataFrame
+    """
+    return pd.read_csv(files.sPF_data)
+
+def test_SetShardBoundaries(dfC_input):
+    """
+    Shards cut only at device run starts
+    """
+    par = align_parallel.ParallelIntensityByDecr(dfC_input, iShardRows=10)
+    par.SetShardBoundaries()
+    assert par.lst_shards == [(0, 15), (15, 30), (30, 40)]
+
+    par.iShardRows = 20
+    par.SetShardBoundaries()
+    assert par.lst_shards == [(0, 30), (30, 40)]
+
+@pytest.mark.parametrize('sEngine', ['pandas', 'numpy'])
+def test_parallel_matches_serial(dfC_input, sEngine):
+    """
+    Merged parallel results match the single-process class in original row order
+    """
+    align = align_intensity.SummIntensityByDecr(dfC_input.copy())
+    par = align_parallel.ParallelIntensityByDecr(dfC_input, n_workers=2, iShardRows=5, 
+                                                 sEngine=sEngine)
+    pd.testing.assert_frame_equal(par.dfC, align.dfC)
+    pd.testing.assert_series_equal(par.ser_summ_intensity, align.ser_summ_intensity,
+                                   check_index_type=False)
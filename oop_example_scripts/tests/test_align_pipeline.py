@@ -0,0 +1,89 @@
+#Version 10/17/26
+#python -m pytest test_align_pipeline.py -v -s
+
+#Set home (projname_scripts) Path and import needed libraries
+import pandas as pd
+import numpy as np
+import pytest
+import sys, os
+from pathlib import Path
+sPathHome = str(Path(__file__).parent)
+sPathHome = sPathHome[0:sPathHome.rfind(os.sep)]
+if not sPathHome in sys.path: sys.path.append(sPathHome)
+sPathLibs = sPathHome + os.sep + 'libs'
+if not sPathLibs in sys.path: sys.path.append(sPathLibs)
+import scriptsfiles
+import dfcache
+import align_intensity
+import align_pipeline
+
+pytest.importorskip('pyarrow')
+
+@pytest.fixture
+def files(tmp_path):
+    """
+    Instance the project files class with cache folder in pytest temp dir
+    """
+    files = scriptsfiles.ScriptsFiles_New(IsTest=True)
+    files.spathcache = str(tmp_path) + os.sep
+    return files
+
+def test_files_spathcache():
+    files = scriptsfiles.ScriptsFiles_New(IsTest=True)
+    assert files.spathcache == files.spathdata + 'cache' + os.sep
+
+def test_LoadAlignedData(files):
+    """
+    Second load is a cache hit returning the same transformed DataFrame
+    """
+    cache = dfcache.DataFrameCache(files.spathcache)
+    df1, IsHit1 = align_pipeline.LoadAlignedData(files, cache=cache)
+    df2, IsHit2 = align_pipeline.LoadAlignedData(files, cache=cache)
+    assert (IsHit1, IsHit2) == (False, True)
+    assert cache.dict_stats == {'hits':1, 'misses':1, 'evicted':0}
+    pd.testing.assert_frame_equal(df2, df1)
+    assert list(df2['intensity_aligned'].dropna().index) == [6,7,13,14,21,27,28,29,31,36,38,39]
+
+@pytest.mark.parametrize('sEngine', ['pandas', 'numpy'])
+def test_ReadDataCompact(files, sEngine):
+    """
+    Compact dtypes use less memory and transform to the same aligned values
+    """
+    df, dict_mem = align_pipeline.ReadDataCompact(files, IsReport=True)
+    cols = ['device_id', 'refill_percent', 'intensity']
+    assert [str(df[col].dtype) for col in cols] == ['category', 'UInt8', 'float32']
+    assert df['timestamp'].dtype.kind == 'M'
+    assert dict_mem['compact'] < dict_mem['default']
+
+    align = align_intensity.SummIntensityByDecr(df, sEngine=sEngine)
+    align_default = align_intensity.SummIntensityByDecr(pd.read_csv(files.sPF_data))
+    assert list(align.ser_summ_intensity) == [7.5, 5.25, 9.5]
+    assert list(align.ser_summ_intensity.index) == ['DSN_001', 'DSN_002', 'DSN_003']
+    np.testing.assert_array_equal(align.dfC['intensity_aligned'].to_numpy(np.float64),
+                                  align_default.dfC['intensity_aligned'].to_numpy())
+
+def test_cache_key_version(files):
+    """
+    Key changes with transform version
+    """
+    cache = dfcache.DataFrameCache(files.spathcache)
+    sKey = cache.Key(files.sPF_data, align_intensity.TRANSFORM_VERSION)
+    assert sKey == cache.Key(files.sPF_data, align_intensity.TRANSFORM_VERSION)
+    assert sKey != cache.Key(files.sPF_data, align_intensity.TRANSFORM_VERSION + 1)
+
+def test_Evict(files):
+    """
+    Least recently used entries are evicted past the size cap
+    """
+    cache = dfcache.DataFrameCache(files.spathcache)
+    df = pd.DataFrame({'a':np.arange(1000.)})
+    for i, sKey in enumerate(['k1', 'k2', 'k3']):
+        cache.Put(sKey, df)
+        os.utime(cache.PathEntry(sKey), (i, i))
+    iEntryBytes = os.path.getsize(cache.PathEntry('k1'))
+
+    cache.Get('k1')
+    cache.iMaxBytes = 2 * iEntryBytes
+    cache.Evict()
+    assert sorted(os.listdir(files.spathcache)) == ['k1.feather', 'k3.feather']
+    assert cache.dict_stats['evicted'] == 1
@@ -0,0 +1,73 @@
+#Version 10/17/26
+#python -m pytest test_align_stream.py -v -s
+
+#Set home (projname_scripts) Path and import needed libraries
+import pandas as pd
+import numpy as np
+import pytest
+import sys, os
+from pathlib import Path
+sPathHome = str(Path(__file__).parent)
+sPathHome = sPathHome[0:sPathHome.rfind(os.sep)]
+if not sPathHome in sys.path: sys.path.append(sPathHome)
+sPathLibs = sPathHome + os.sep + 'libs'
+if not sPathLibs in sys.path: sys.path.append(sPathLibs)
+import scriptsfiles
+import align_intensity
+import align_stream
+
+@pytest.fixture
+def files():
+    """
+    Instance the project files class
+    """
+    return scriptsfiles.ScriptsFiles_New(IsTest=True)
+
+@pytest.fixture
+def align_inmem(files):
+    """
+    In-memory (full DataFrame) run for comparison
+    """
+    return align_intensity.SummIntensityByDecr(pd.read_csv(files.sPF_data))
+
+@pytest.mark.parametrize('iChunkRows', [1, 7, 15, 16, 100])
+def test_IterAlignedChunks(files, align_inmem, iChunkRows):
+    """
+    Chunked alignment matches in-memory result for any chunk boundary placement
+    """
+    stream = align_stream.StreamIntensityByDecr(files.sPF_data, iChunkRows)
+    df = pd.concat(list(stream.IterAlignedChunks()))
+    pd.testing.assert_frame_equal(df, align_inmem.dfC)
+    pd.testing.assert_series_equal(stream.ser_summ_intensity, align_inmem.ser_summ_intensity,
+                                   check_index_type=False)
+    assert stream.n_rows == 40
+
+def test_WriteAlignedCsv(files, align_inmem, tmp_path):
+    """
+    Stream aligned rows to CSV
+    """
+    sPF_out = str(tmp_path / files.sF_data_out)
+    stream = align_stream.StreamIntensityByDecr(files.sPF_data, 9)
+    ser = stream.WriteAlignedCsv(sPF_out)
+    assert stream.n_chunks == 5
+    assert list(ser) == [7.5, 5.25, 9.5]
+    df = pd.read_csv(sPF_out)
+    assert list(df.columns) == list(align_inmem.dfC.columns)
+    assert list(df['intensity_aligned'].dropna().index) == [6,7,13,14,21,27,28,29,31,36,38,39]
+
+@pytest.mark.parametrize('iQueueSize', [1, 4])
+def test_AsyncAlignPipeline(files, align_inmem, tmp_path, iQueueSize):
+    """
+    Async read/align/write of two files matches in-memory results
+    """
+    lst_pairs = [(files.sPF_data, str(tmp_path / 'out1.csv')),
+                 (files.sPF_data, str(tmp_path / 'out2.csv'))]
+    pipeline = align_stream.AsyncAlignPipeline(lst_pairs, iChunkRows=6, iQueueSize=iQueueSize)
+    dict_summaries = pipeline.Run()
+    assert pipeline.n_chunks == 14
+
+    df_expected = align_inmem.dfC
+    for _, sPF_out in lst_pairs:
+        df = pd.read_csv(sPF_out)
+        np.testing.assert_array_equal(df['intensity_aligned'], df_expected['intensity_aligned'])
+        assert list(dict_summaries[sPF_out]) == [7.5, 5.25, 9.5]
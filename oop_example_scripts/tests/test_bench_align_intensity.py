@@ -0,0 +1,46 @@
+#Version 10/17/26
+#python -m pytest test_bench_align_intensity.py -v -s
+
+#Set home (projname_scripts) Path and import needed libraries
+import pandas as pd
+import numpy as np
+import pytest
+import sys, os
+from pathlib import Path
+sPathHome = str(Path(__file__).parent)
+sPathHome = sPathHome[0:sPathHome.rfind(os.sep)]
+if not sPathHome in sys.path: sys.path.append(sPathHome)
+sPathLibs = sPathHome + os.sep + 'libs'
+if not sPathLibs in sys.path: sys.path.append(sPathLibs)
+import align_intensity
+import bench_align_intensity as bench
+
+@pytest.mark.parametrize('IsCategorical', [False, True])
+def test_SyntheticDeviceData(IsCategorical):
+    """
+    Synthetic data has data.csv columns, grouped devices and realistic sparsity
+    """
+    df = bench.SyntheticDeviceData(20_000, IsCategorical=IsCategorical)
+    assert list(df.columns) == ['device_id', 'timestamp', 'refill_percent', 'intensity']
+    assert df.index.size == 20_000
+    assert df['device_id'].nunique() == 20
+
+    #Each device is one contiguous run with non-decreasing timestamps
+    arr_codes, _ = align_intensity.DeviceCodes(df['device_id'])
+    assert align_intensity.DeviceChangeArray(arr_codes).sum() == 20
+    assert df.groupby('device_id', observed=True)['timestamp'].is_monotonic_increasing.all()
+    assert df['timestamp'].duplicated().mean() > 0.1
+
+    assert 0.3 < df['refill_percent'].notnull().mean() < 0.4
+    assert 0.05 < df['intensity'].notnull().mean() < 0.15
+    assert (df['refill_percent'].notnull() & df['intensity'].notnull()).any()
+
+def test_RunSuite_results(tmp_path):
+    """
+    Results JSON round trip and comparison
+    """
+    dict_bench = bench.RunSuite([1000], lst_engines=['numpy'])
+    sPF = bench.WriteResults(dict_bench, str(tmp_path / 'bench.json'))
+    df = bench.CompareResults(sPF, sPF)
+    assert 'steps.FillDownDecrIntensity' in df.columns
+    assert list(df['numpy.dfC']) == [1.0]
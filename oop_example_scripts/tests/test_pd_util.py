@@ -0,0 +1,299 @@
+#Version 10/17/26
+#python -m pytest test_pd_util.py -v -s
+
+#Set home (projname_scripts) Path and import needed libraries
+import pandas as pd
+import numpy as np
+import pytest
+import sys, os
+from pathlib import Path
+sPathHome = str(Path(__file__).parent)
+sPathHome = sPathHome[0:sPathHome.rfind(os.sep)]
+if not sPathHome in sys.path: sys.path.append(sPathHome)
+sPathLibs = sPathHome + os.sep + 'libs'
+if not sPathLibs in sys.path: sys.path.append(sPathLibs)
+import util
+import pd_util
+import bench_pd_util as bench
+
+@pytest.fixture
+def dfFlags():
+    """
+    1/blank, Boolean and mixed object (1/None/NaN) flag columns
+    """
+    return bench.SyntheticFlagData(200)
+
+@pytest.mark.parametrize('MapFunc, VecFunc, col', [
+    (bench.RecodeFlagColToBooleanMap, pd_util.RecodeFlagColToBoolean, 'flag_ones'),
+    (bench.RecodeFlagColToBooleanMap, pd_util.RecodeFlagColToBoolean, 'flag_obj'),
+    (bench.RecodeFlagColToBooleanMap, pd_util.RecodeFlagColToBoolean, 'flag_bool'),
+    (bench.RecodeFlagColToOnesMap, pd_util.RecodeFlagColToOnes, 'flag_bool'),
+    (bench.RecodeFlagColToOnesMap, pd_util.RecodeFlagColToOnes, 'flag_ones'),
+    (bench.RecodeFlagColToOnesZeroesMap, pd_util.RecodeFlagColToOnesZeroes, 'flag_bool'),
+    (bench.RecodeFlagColToOnesZeroesMap, pd_util.RecodeFlagColToOnesZeroes, 'flag_obj')])
+def test_RecodeFlagCol_matches_map(dfFlags, MapFunc, VecFunc, col):
+    """
+    Vectorized recoders match the former Series.map versions (values and dtype)
+    """
+    df_expected = MapFunc(dfFlags[[col]].copy(), col)
+    pd.testing.assert_frame_equal(VecFunc(dfFlags[[col]].copy(), col), df_expected)
+
+def test_RecodeFlagCol_lists(dfFlags):
+    """
+    Column lists recode each column; missing and empty columns are skipped
+    """
+    df = pd_util.RecodeFlagColToBoolean(dfFlags.copy(), ['flag_ones', 'flag_obj', 'missing'])
+    for col in ['flag_ones', 'flag_obj']:
+        df_expected = bench.RecodeFlagColToBooleanMap(dfFlags[[col]].copy(), col)
+        pd.testing.assert_series_equal(df[col], df_expected[col])
+    pd.testing.assert_series_equal(df['flag_bool'], dfFlags['flag_bool'])
+
+    dfEmpty = pd.DataFrame({'flag':pd.Series([], dtype=object)})
+    assert pd_util.RecodeFlagColToOnes(dfEmpty, ['flag'])['flag'].dtype == object
+
+def test_RecodeFlagColToBoolean_string_na():
+    """
+    Only float NaN counts as blank (as util.IsNullVal): None, NaT and pd.NA stay True
+    """
+    df = pd.DataFrame({'s':pd.Series(['1', pd.NA, '1'], dtype='string'),
+                       'o':pd.Series([1, None, np.nan], dtype=object),
+                       't':pd.to_datetime(['2022-06-08', None, '2022-06-09'])})
+    df_expected = df.copy()
+    for col in df.columns:
+        df_expected = bench.RecodeFlagColToBooleanMap(df_expected, col)
+    df = pd_util.RecodeFlagColToBoolean(df, list(df.columns))
+    pd.testing.assert_frame_equal(df, df_expected)
+    assert list(df['o']) == [True, True, False]
+
+@pytest.mark.parametrize('fUnique', [1., 0.1])
+def test_EvalCol_matches_eval(fUnique):
+    """
+    Safe parse matches the former eval-based EvalCol on nested JSON cells
+    """
+    df = bench.SyntheticJSONCol(500, fUnique)
+    df_expected = bench.EvalColEval(df.copy(), 'payload')
+    assert pd_util.EvalCol(df, 'payload')['payload'].tolist() == df_expected['payload'].tolist()
+
+def test_EvalCol_fallback():
+    """
+    Non-JSON literals fall back to ast.literal_eval; unparseable text and code stay strings
+    """
+    lst = ["{'a': (1, 2)}", '[1, 2]', '{"a": true, "b": null}', '[1, 2', 'xxx',
+           '__import__("os").getcwd()', '1 + 1', 'NaN', '[NaN]', '-Infinity', 5, None]
+    df = pd_util.EvalCol(pd.DataFrame({'c':lst}), 'c')
+    assert df['c'].tolist() == [{'a':(1, 2)}, [1, 2], {'a':True, 'b':None}, '[1, 2', 'xxx',
+                                '__import__("os").getcwd()', '1 + 1', 'NaN', '[NaN]', '-Infinity', 5, None]
+    assert [util.EvalAll(s) for s in lst] == df['c'].tolist()
+    assert util.EvalAll('[1.5, "NaN"]') == [1.5, 'NaN']
+
+def test_EvalCol_cache_per_call():
+    """
+    Default parser's cache lives for one call: mutating a result does not leak into
+    later calls. A shared parser is opt-in and counts cache reuse
+    """
+    df1 = pd_util.EvalCol(pd.DataFrame({'c':['{"a": 1}']}), 'c')
+    df1['c'][0]['a'] = 99
+    df2 = pd_util.EvalCol(pd.DataFrame({'c':['{"a": 1}']}), 'c')
+    assert df2['c'][0] == {'a':1}
+
+    parser = pd_util.LiteralColParser()
+    for _ in range(2):
+        pd_util.EvalCol(pd.DataFrame({'c':['[1]', '[1]', '[2]', 'x']}), 'c', parser)
+    assert parser.dict_stats == {'cells':8, 'unique':6, 'parsed':3}
+
+def SplitAndStackLegacy(df, lst_keys, splitcol, sDelim, sIDCol):
+    """
+    Former str.split(expand=True) + stack version of pd_util.SplitAndStack
+    (dropna restores pandas<3 stack, which dropped the padding of short rows)
+    """
+    dftemp = df.copy().loc[:, lst_keys + [splitcol]].set_index(lst_keys)
+    ser = dftemp[splitcol].str.split(sDelim, expand=True).stack().dropna()
+    ser.index.names = lst_keys + [sIDCol]
+    return ser.reset_index().rename(columns={0:splitcol})
+
+@pytest.fixture
+def dfDelim():
+    """
+    Two-key frame with a two-level delimited column, a null and an empty string
+    """
+    return pd.DataFrame({'site':['s1', 's1', 's2', 's2', 's3'], 'day':[1, 2, 1, 2, 1],
+                         'other':[10., 20., 30., 40., 50.],
+                         'settings':['a=1;b=2', 'a=3;b=4;c=5', None, 'b=6', '']})
+
+def test_SplitAndStack_matches_legacy(dfDelim):
+    """
+    Explode-based split/stack matches the former expand + stack output
+    """
+    for sDelim in [';', '=']:
+        df = pd_util.SplitAndStack(dfDelim, ['site', 'day'], 'settings', sDelim, 'ID')
+        df_expected = SplitAndStackLegacy(dfDelim, ['site', 'day'], 'settings', sDelim, 'ID')
+        pd.testing.assert_frame_equal(df, df_expected, check_dtype=False)
+        assert df['ID'].dtype == np.int64
+
+def test_SplitAndStack_non_string(dfDelim):
+    """
+    Non-string cells (numbers, lists) are skipped like nulls, in any block
+    """
+    dfDelim['settings'] = pd.Series(['a;b', 5, None, ['x'], 'c'], dtype=object)
+    df = pd_util.SplitAndStack(dfDelim, ['site', 'day'], 'settings', ';', 'ID')
+    assert df.values.tolist() == [['s1', 1, 0, 'a'], ['s1', 1, 1, 'b'], ['s3', 1, 0, 'c']]
+    df = pd_util.SplitAndStack(dfDelim.iloc[1:2], ['site', 'day'], 'settings', ';', 'ID')
+    assert df.index.size == 0
+
+@pytest.mark.parametrize('iChunkRows', [1, 2, 100])
+def test_SplitAndSubsplitDelimitedColumn(dfDelim, iChunkRows):
+    """
+    Row-block output matches applying the legacy split/stack per delimiter
+    """
+    df_expected, lstKeys = dfDelim, ['site', 'day']
+    for i, sDelim in enumerate([';', '='], start=1):
+        df_expected = SplitAndStackLegacy(df_expected, lstKeys, 'settings', sDelim, 'ID' + str(i))
+        lstKeys = lstKeys + ['ID' + str(i)]
+    df, lstKeysOut = pd_util.SplitAndSubsplitDelimitedColumn(dfDelim, ['site', 'day'], 'settings',
+                                                             [';', '='], 'ID', iChunkRows)
+    assert lstKeysOut == lstKeys
+    pd.testing.assert_frame_equal(df, df_expected, check_dtype=False)
+
+def SubSplitColumnAndJoinLegacy(df, lst_keys, sSplitCol, sDelim1, sDelim2):
+    """
+    Former per-element-column split + merge version of pd_util.SubSplitColumnAndJoin
+    (names every column from the first row, so needs uniform names in each row)
+    """
+    df2 = df.set_index(lst_keys).copy()[sSplitCol].str.split(sDelim1, expand=True)
+    dfFinal = pd.DataFrame()
+    for col in df2.columns:
+        dftemp = df2[col].str.split(sDelim2, expand=True)
+        dftemp = dftemp.rename(columns={1:dftemp[0].iloc[0]}).drop(0, axis=1)
+        dfFinal = dftemp if dfFinal.index.size < 1 else \
+                  dfFinal.merge(dftemp, left_index=True, right_index=True)
+    return dfFinal.reset_index(drop=False)
+
+@pytest.fixture(params=[True, False], ids=['arrow', 'joined'])
+def IsPyArrow(request, monkeypatch):
+    """
+    Run name/value splitting with Arrow kernels and with the pure pandas fallback
+    """
+    if request.param and not pd_util.IsPyArrow: pytest.skip('pyarrow not installed')
+    monkeypatch.setattr(pd_util, 'IsPyArrow', request.param)
+    return request.param
+
+@pytest.mark.parametrize('dtype', [object, 'str'])
+def test_SubSplitColumnAndJoin_matches_legacy(IsPyArrow, dtype):
+    """
+    Uniform name=value rows match the former merge-loop version (values and dtypes)
+    """
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'site':np.repeat(['s1', 's2'], 25), 'day':np.tile(np.arange(25), 2)})
+    df['settings'] = pd.Series([';'.join('p' + str(j) + '=' + str(v) for j, v in enumerate(arr))
+                                for arr in rng.integers(0, 99, (50, 6))], dtype=dtype)
+    df_expected = SubSplitColumnAndJoinLegacy(df, ['site', 'day'], 'settings', ';', '=')
+    df_out = pd_util.SubSplitColumnAndJoin(df, ['site', 'day'], 'settings', ';', '=')
+    pd.testing.assert_frame_equal(df_out, df_expected)
+
+@pytest.mark.parametrize('sDelim1, sDelim2', [(';', '='), ('||', ':=')])
+def test_SubSplitColumnAndJoin_mixed_names(IsPyArrow, sDelim1, sDelim2):
+    """
+    Rows with different/reordered names, missing or repeated names, extra sDelim2,
+    elements without sDelim2 and null/non-string cells
+    """
+    lst = ['a=1;b=2', 'b=3;a=4;c=5', None, 'c=6;c=7', 'x;d=8=9;=10', 5, '']
+    lst = [s.replace(';', sDelim1).replace('=', sDelim2) if isinstance(s, str) else s for s in lst]
+    df = pd.DataFrame({'key':range(7), 'settings':pd.Series(lst, dtype=object)})
+    df_out = pd_util.SubSplitColumnAndJoin(df, ['key'], 'settings', sDelim1, sDelim2)
+    df_expected = pd.DataFrame({'key':range(7),
+                                'a':['1', '4', np.nan, np.nan, np.nan, np.nan, np.nan],
+                                'b':['2', '3', np.nan, np.nan, np.nan, np.nan, np.nan],
+                                'c':[np.nan, '5', np.nan, '7', np.nan, np.nan, np.nan],
+                                'd':[np.nan] * 4 + ['8' + sDelim2 + '9', np.nan, np.nan],
+                                '':[np.nan] * 4 + ['10', np.nan, np.nan]}, dtype=object)
+    df_expected['key'] = df_expected['key'].astype(np.int64)
+    pd.testing.assert_frame_equal(df_out, df_expected)
+
+def test_SplitNameValuePairs_paths_agree():
+    """
+    Arrow and joined fallback splits agree on random well-formed and malformed cells
+    """
+    if not pd_util.IsPyArrow: pytest.skip('pyarrow not installed')
+    rng = np.random.default_rng(1)
+    arr_toks = np.array(['a', 'b', 'c', '=', '=', ';', ';', ''], dtype=object)
+    ser = pd.Series([''.join(rng.choice(arr_toks, rng.integers(0, 12))) for _ in range(400)])
+    arr_pos = np.arange(ser.size)
+    arr_rows, arr_codes, idx_names, arr_vals = pd_util.SplitNameValuePairsArrow(ser, arr_pos, ';', '=')
+    lst_expected = pd_util.SplitNameValuePairsJoined(ser, arr_pos, ';', '=')
+    np.testing.assert_array_equal(arr_rows, lst_expected[0])
+    assert list(idx_names[arr_codes]) == list(lst_expected[1])
+    assert list(arr_vals) == list(lst_expected[2])
+
+def ParseDelimitedColLegacy(df, lst_keys, col, lstDelim, sIDPrefix):
+    """
+    Former SplitAndSubsplitDelimitedColumn -> PivotOnLastID -> UnstackLastSplit chain
+    """
+    lstKeys = list(lst_keys)
+    for i, sDelim in enumerate(lstDelim, start=1):
+        df = SplitAndStackLegacy(df, lstKeys, col, sDelim, sIDPrefix + str(i))
+        lstKeys.append(sIDPrefix + str(i))
+    dfShaped = df.pivot(index=lstKeys[0:-1], columns=lstKeys[-1], values=col)
+    dfShaped.columns = ['param', 'value']
+    dfShaped = dfShaped.reset_index(level=dfShaped.index.names[-1], drop=True)
+    dfShaped = dfShaped.set_index('param', append=True).unstack(level=-1).droplevel(0, axis=1)
+    dfShaped.columns.name = None
+    return dfShaped
+
+@pytest.fixture
+def dfMultiDelim():
+    """
+    Keys, a non-split column and two name=value columns with overlapping names
+    """
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'site':np.repeat(['s1', 's2'], 10), 'day':np.tile(np.arange(10), 2),
+                       'other':rng.random(20)})
+    for col in ['settings', 'faults']:
+        df[col] = [';'.join('p' + str(j) + '=' + str(v) for j, v in enumerate(arr))
+                   for arr in rng.integers(0, 9, (20, 3))]
+    df.loc[3, 'faults'] = None
+    return df
+
+@pytest.mark.parametrize('n_workers', [1, 2])
+def test_DelimitedColsPipeline(dfMultiDelim, tmp_path, monkeypatch, n_workers):
+    """
+    In-process and process pool runs match the legacy chain joined column by column;
+    no temp2.csv debug file is written
+    """
+    monkeypatch.chdir(tmp_path)
+    lst_keys = ['site', 'day']
+    lst_specs = [('settings', [';', '=']), ('faults', [';', '='])]
+    pipeline = pd_util.DelimitedColsPipeline(lst_keys, lst_specs, n_workers, IsPrefixCols=True)
+    df = pipeline.Run(dfMultiDelim)
+
+    df_expected = dfMultiDelim.drop(columns=['settings', 'faults'])
+    for col, lstDelim in lst_specs:
+        dfParsed = ParseDelimitedColLegacy(dfMultiDelim, lst_keys, col, lstDelim, 'ID_' + col + '_')
+        df_expected = df_expected.merge(dfParsed.add_prefix(col + '_'), how='left',
+                                        left_on=lst_keys, right_index=True)
+    pd.testing.assert_frame_equal(df, df_expected, check_dtype=False)
+    assert df['faults_p0'].isna().tolist() == [i == 3 for i in range(20)]
+    assert not os.path.exists(tmp_path / 'temp2.csv')
+
+def test_DelimitedColsPipeline_leading_ids(dfMultiDelim):
+    """
+    One spec with a leading delimiter adds its ID column; two such specs are rejected
+    """
+    dfMultiDelim['groups'] = 'p=1|p=2'
+    dfMultiDelim['faults'] = 'q=1|q=2|q=3'
+    pipeline = pd_util.DelimitedColsPipeline(['site', 'day'], [('groups', ['|', ';', '='])], 1)
+    df = pipeline.Run(dfMultiDelim.drop(columns=['settings', 'faults']))
+    assert df.index.size == 40
+    assert list(df.columns) == ['site', 'day', 'other', 'ID_groups_1', 'p']
+    assert df.loc[df['day'] == 0, 'p'].tolist() == ['1', '2', '1', '2']
+
+    with pytest.raises(ValueError, match='groups'):
+        pd_util.DelimitedColsPipeline(['site', 'day'], [('groups', ['|', ';', '=']),
+                                                        ('faults', ['|', ';', '='])])
+
+def test_ImportDataFrame_needs_colinfo(monkeypatch):
+    """
+    pd_util imports without colinfo; only ImportDataFrame* require it
+    """
+    monkeypatch.setattr(pd_util, 'colinfo', None)
+    with pytest.raises(ImportError, match='colinfo'):
+        pd_util.ImportDataFrame(None, 'data.csv')